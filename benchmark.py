@@ -0,0 +1,288 @@
+"""
+Benchmark suite for the scraper's hot paths.
+
+Runs without network access on synthetic pages that mimic jobs.cz detail
+pages and prints per-page CPU time and peak memory for every case.
+
+Usage:
+    python benchmark.py [benchmark ...] [--pages N] [--jobs N] [--runs N]
+
+Available benchmarks are listed in BENCHMARKS; all of them run when none
+is given.
+"""
+import argparse
+import difflib
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+import scraper
+
+logging.getLogger().setLevel(logging.WARNING)
+
+def make_detail_page(index: int, declare_charset: bool = True) -> bytes:
+    """
+    Builds a jobs.cz-like detail page of roughly 150 kB: navigation, the ad
+    body with Czech text, related-job widgets and a footer.
+    """
+    meta = '<meta charset="utf-8">' if declare_charset else ''
+    paragraphs = ''.join(f'<p>Odstavec {i}: Hledáme vývojáře se znalostí Pythonu, Žluťoučký kůň.</p>' for i in range(60))
+    related = ''.join(
+        f'<article class="RelatedCard"><h3>Podobná nabídka {i}</h3><p>{"Popis pozice " * 20}</p></article>'
+        for i in range(200)
+    )
+    html = (
+        f'<!DOCTYPE html><html><head>{meta}<title>Nabídka {index}</title>'
+        f'<script>{"var tracking = 1;" * 200}</script></head><body>'
+        f'<nav>{"<a href=/x>Menu</a>" * 100}</nav>'
+        f'<div data-jobad="body"><h1>Python vývojář {index}</h1>{paragraphs}'
+        f'<script>bad()</script><ul><li>Python</li><li>Django</li></ul></div>'
+        f'<section>{related}</section><footer>© Jobs.cz</footer></body></html>'
+    )
+    return html.encode('utf-8')
+
+def measure(function: Callable[[bytes], object], pages: List[bytes]) -> Tuple[float, float]:
+    """
+    Runs function over every page and returns the CPU time per page in
+    milliseconds and the peak memory per page in kB as traced by
+    tracemalloc (allocations through Python's allocator only, so lxml's C
+    tree is not included).
+    """
+    function(pages[0])  # warm-up
+    cpu_started = time.process_time()
+    for page in pages:
+        function(page)
+    cpu_ms = (time.process_time() - cpu_started) * 1000 / len(pages)
+
+    peaks = []
+    for page in pages[:5]:
+        tracemalloc.start()
+        function(page)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return cpu_ms, max(peaks) / 1024
+
+def measure_once(function: Callable[[], object]) -> Tuple[float, float]:
+    """
+    Runs function once and returns its CPU time in milliseconds and its
+    peak traced memory in kB.
+    """
+    cpu_started = time.process_time()
+    function()
+    cpu_ms = (time.process_time() - cpu_started) * 1000
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024
+
+def report(title: str, results: Dict[str, Tuple[float, float]], unit: str = 'page'):
+    """
+    Prints one table of benchmark results.
+    """
+    print(f"\n{title}")
+    print(f"{'case':<52} {'CPU ms/' + unit:>12} {'peak kB/' + unit:>13}")
+    for name, (cpu_ms, peak_kb) in results.items():
+        print(f"{name:<52} {cpu_ms:>12.2f} {peak_kb:>13.0f}")
+
+def bench_decoding(args: argparse.Namespace):
+    """
+    Compares the old text-based decoding (charset detection when no charset
+    is declared, a decoded str copy handed to BeautifulSoup) with the
+    byte-level path (declared or meta charset, raw bytes to the parser).
+    """
+    board = scraper.JobsCzScraper(parser='lxml')
+    results = {}
+    for declared in (True, False):
+        pages = [make_detail_page(i, declare_charset=declared) for i in range(args.pages)]
+        label = 'meta charset' if declared else 'no charset'
+
+        def old_path(body: bytes):
+            # What response.text did for a response without a charset header
+            encoding = requests.compat.chardet.detect(body)['encoding']
+            parse_only = scraper.RegionStrainer(board.DETAIL_REGIONS)
+            soup = BeautifulSoup(body.decode(encoding, errors='replace'), board.parser, parse_only=parse_only)
+            return board.extract_job_text(soup)
+
+        def new_path(body: bytes):
+            encoding, _ = scraper.sniff_encoding(body)
+            return board.extract_job_text(board.make_soup(body, encoding, board.DETAIL_REGIONS))
+
+        results[f"text + detection ({label})"] = measure(old_path, pages)
+        results[f"bytes + sniffed charset ({label})"] = measure(new_path, pages)
+        if scraper.LexborHTMLParser is not None:
+            lexbor = scraper.SelectolaxJobsCzScraper()
+
+            def lexbor_path(body: bytes):
+                encoding, _ = scraper.sniff_encoding(body)
+                return lexbor.extract_detail_text(body, encoding)
+
+            results[f"bytes + sniffed charset, lexbor ({label})"] = measure(lexbor_path, pages)
+    report("Detail page decoding and parsing", results)
+
+def make_job(index: int) -> Dict:
+    """
+    Builds a scraped job with a description of about 1.5 kB.
+    """
+    return {
+        'title': f"Python vývojář {index}",
+        'url': f"https://www.jobs.cz/rpd/{2000000000 + index}/",
+        'job_id': str(2000000000 + index),
+        'queries': ['python', 'django'],
+        'company': f"Firma {index} s.r.o.",
+        'location': "Praha",
+        'salary': "50000–80000 CZK/MONTH",
+        'date_posted': "2026-10-01",
+        'text': '\n'.join(f"Odstavec {i}: Hledáme vývojáře se znalostí Pythonu a Djanga." for i in range(25)),
+    }
+
+def render_concatenated(jobs: List[Dict]) -> str:
+    """
+    The previous renderer: one growing str extended with += per line.
+    """
+    content = f"# Python pracovní nabídky\nPoslední aktualizace: now\nPočet nalezených nabídek: {len(jobs)}\n\n"
+    for job in jobs:
+        content += f"## {job['title']}\n"
+        content += f"URL adresa: {job['url']}\n"
+        content += f"ID: {job['job_id']}\n"
+        content += f"Hledané výrazy: {', '.join(job['queries'])}\n"
+        content += f"Společnost: {job['company']}\n"
+        content += f"Lokalita: {job['location']}\n"
+        content += f"Mzda: {job['salary']}\n"
+        content += f"Datum zveřejnění: {job['date_posted']}\n"
+        content += f"Text inzerátu:\n{job['text']}\n"
+        content += "\n---\n\n"
+    return content
+
+def bench_markdown(args: argparse.Namespace):
+    """
+    Renders the markdown document for args.jobs synthetic jobs with the
+    previous concatenating renderer and the streaming renderer, both
+    joined into one str and written straight to a file, and the lines
+    the Google Doc diff is built from: split from the previous renderer's
+    str vs. split chunk by chunk (markdown_lines).
+    """
+    job_scraper = scraper.JobScraper(parser='html.parser')
+    job_scraper.jobs = [make_job(i) for i in range(args.jobs)]
+
+    def write_to_file():
+        with open(os.devnull, 'w', encoding='utf-8') as f:
+            job_scraper.write_markdown(f)
+
+    results = {
+        "str += per line": measure_once(lambda: render_concatenated(job_scraper.jobs)),
+        "create_markdown_content (chunks joined)": measure_once(job_scraper.create_markdown_content),
+        "write_markdown to file": measure_once(write_to_file),
+        "Doc lines: str += then split_lines": measure_once(lambda: scraper.split_lines(render_concatenated(job_scraper.jobs))),
+        "Doc lines: markdown_lines": measure_once(job_scraper.markdown_lines),
+    }
+    report(f"Markdown rendering of {args.jobs} jobs", results, unit='run')
+
+def line_diff_requests(current: str, content: str) -> int:
+    """
+    The previous Google Doc diff: one line-level difflib run over the
+    whole documents. Returns the number of changed blocks.
+    """
+    matcher = difflib.SequenceMatcher(None, scraper.split_lines(current), scraper.split_lines(content), autojunk=False)
+    return sum(1 for opcode in matcher.get_opcodes() if opcode[0] != 'equal')
+
+def bench_doc_diff(args: argparse.Namespace):
+    """
+    Times the Google Doc diff between a published document and the next
+    run's document with one new and one edited job, for growing numbers
+    of jobs (up to args.jobs). Every synthetic job repeats the same
+    description lines, the worst case for a line-level diff, which is
+    only timed up to 2000 jobs as it grows much faster than linearly.
+    """
+    job_scraper = scraper.JobScraper(parser='html.parser')
+    results = {}
+    for count in sorted({500, 2000, args.jobs}):
+        job_scraper.jobs = [make_job(i) for i in range(count)]
+        current = job_scraper.create_markdown_content()
+        job_scraper.jobs.insert(count // 2, make_job(count))
+        job_scraper.jobs[count // 3] = dict(job_scraper.jobs[count // 3], text="Upravený popis")
+        lines = job_scraper.markdown_lines()
+        content = ''.join(lines)
+        results[f"section diff, {count} jobs"] = measure_once(lambda: job_scraper.diff_requests(current, lines))
+        if count <= 2000:
+            results[f"line diff (previous), {count} jobs"] = measure_once(lambda: line_diff_requests(current, content))
+    report("Google Doc diff (1 new + 1 edited job)", results, unit='run')
+
+# Startup scenarios timed in fresh interpreters by bench_cold_start
+COLD_START_SCENARIOS = {
+    "import scraper": "import scraper",
+    "scrape-only startup (JobScraper())": "import scraper; scraper.JobScraper()",
+    "+ import Google stack and dotenv": (
+        "import scraper; scraper.JobScraper(); "
+        "import dotenv, google.oauth2.service_account, googleapiclient.discovery"
+    ),
+    "+ build Docs client (static discovery)": (
+        "import scraper; scraper.JobScraper(); "
+        "import google.auth.credentials, googleapiclient.discovery; "
+        "googleapiclient.discovery.build('docs', 'v1', credentials=google.auth.credentials.AnonymousCredentials(), "
+        "static_discovery=True, cache_discovery=False)"
+    ),
+}
+
+def bench_cold_start(args: argparse.Namespace):
+    """
+    Times interpreter start-up to a ready scraper in fresh processes
+    (median of args.runs runs): importing the module, constructing a
+    scrape-only JobScraper, and what importing the Google stack and
+    building the Docs client add on top when publishing.
+    Also checks that the scrape-only start-up does not import the Google
+    client libraries.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    print(f"\nCold start (median of {args.runs} runs)")
+    print(f"{'case':<52} {'wall ms':>12}")
+    for name, code in COLD_START_SCENARIOS.items():
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=directory, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name:<52} {statistics.median(timings):>12.0f}")
+
+    check = ("import sys, scraper; scraper.JobScraper(); "
+             "print(sorted({m.split('.')[0] for m in sys.modules} & {'google', 'googleapiclient', 'dotenv', 'httplib2'}))")
+    leaked = subprocess.run([sys.executable, '-c', check], cwd=directory, check=True,
+                            capture_output=True, text=True).stdout.strip().splitlines()[-1]
+    print(f"Google modules imported by scrape-only start-up: {leaked}")
+
+# Benchmarks runnable by name
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    'decoding': bench_decoding,
+    'markdown': bench_markdown,
+    'doc_diff': bench_doc_diff,
+    'cold_start': bench_cold_start,
+}
+
+def main():
+    """
+    Runs the selected benchmarks.
+    """
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run ({', '.join(BENCHMARKS)})")
+    arg_parser.add_argument('--pages', type=int, default=50, help="synthetic pages per case")
+    arg_parser.add_argument('--jobs', type=int, default=10000, help="synthetic jobs for the markdown and doc_diff benchmarks")
+    arg_parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per cold start case")
+    args = arg_parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        arg_parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name](args)
+
+if __name__ == "__main__":
+    main()
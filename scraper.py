@@ -1,17 +1,40 @@
 import os
 import json
 import logging
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Callable, Any, TextIO
 import requests
-from bs4 import BeautifulSoup
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from dotenv import load_dotenv
+import aiohttp
+from bs4 import BeautifulSoup, SoupStrainer
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional, only needed for the selectolax engine
+    LexborHTMLParser = None
+try:
+    import xxhash
+except ImportError:  # optional, the parse cache falls back to blake2b
+    xxhash = None
 import re
 from abc import ABC, abstractmethod
 import time
 import sys
+import threading
+import inspect
+import multiprocessing
+import hashlib
+import importlib.metadata
+import random
+import codecs
+import csv
+import difflib
+import sqlite3
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote_plus
+from html import unescape
+from html.parser import HTMLParser
+from requests.adapters import HTTPAdapter
 
 # Configure logging to both file and console
 logging.basicConfig(
@@ -22,14 +45,466 @@ logging.basicConfig(
     ]
 )
 
-# Load environment variables from .env file
-load_dotenv()
+# Read size for streamed detail page downloads
+STREAM_CHUNK_SIZE = 8192
+
+# Consecutive listing pages that may fail before pagination of a query stops
+MAX_LISTING_FAILURES = 3
+
+# Job fields filled from the detail page (as opposed to the listing card)
+DETAIL_FIELDS = ('text', 'date_posted', 'valid_through', 'salary', 'employment_type')
+
+# schema.org JSON-LD blocks embedded in detail pages
+JSON_LD_PATTERN = re.compile(rb'<script[^>]*application/ld\+json[^>]*>(.*?)</script\s*>', re.S | re.I)
+
+# Charset declarations looked up without decoding the body
+CONTENT_TYPE_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET_SCAN_BYTES = 4096
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+def normalize_encoding(name: Optional[str]) -> Optional[str]:
+    """
+    Returns the canonical codec name of an encoding label, or None when
+    Python does not know the encoding.
+    """
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """
+    Returns the charset declared in a Content-Type header, if any.
+    Unlike requests' response.encoding this does not fall back to the
+    ISO-8859-1 default for text/* responses.
+    """
+    match = CONTENT_TYPE_CHARSET_PATTERN.search(content_type or '')
+    return normalize_encoding(match.group(1)) if match else None
+
+def sniff_encoding(body: bytes, declared: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Determines the encoding of a response body without decoding it:
+    1. the charset declared in the Content-Type header
+    2. a byte order mark
+    3. a <meta charset> / http-equiv declaration near the start of the body
+    4. fallback detection: UTF-8 if the body is valid UTF-8, otherwise
+       statistical detection (the same detector requests uses)
+    Returns (encoding, source), source being 'header', 'bom', 'meta' or
+    'fallback'.
+    """
+    encoding = normalize_encoding(declared)
+    if encoding:
+        return encoding, 'header'
+    for bom, bom_encoding in BYTE_ORDER_MARKS:
+        if body.startswith(bom):
+            return bom_encoding, 'bom'
+    match = META_CHARSET_PATTERN.search(body, 0, META_CHARSET_SCAN_BYTES)
+    if match:
+        encoding = normalize_encoding(match.group(1).decode('ascii', errors='ignore'))
+        if encoding:
+            return encoding, 'meta'
+    try:
+        body.decode('utf-8')
+        return 'utf-8', 'fallback'
+    except UnicodeDecodeError:
+        detected = requests.compat.chardet.detect(body).get('encoding')
+        return normalize_encoding(detected) or 'utf-8', 'fallback'
+
+def utf16_len(text: str) -> int:
+    """
+    Returns the length of text in UTF-16 code units, the unit of Google
+    Docs indexes (characters outside the BMP count twice).
+    """
+    return len(text.encode('utf-16-le')) // 2
+
+def split_lines(text: str) -> List[str]:
+    """
+    Splits text into lines that keep their trailing newline. Unlike
+    str.splitlines only '\n' ends a line, so joining the lines always
+    gives back text.
+    """
+    return re.findall(r'[^\n]*\n|[^\n]+$', text)
+
+# Upper bounds of one Google Docs batchUpdate call
+DOC_BATCH_REQUESTS = 200
+DOC_PUBLISH_ROUNDS = 3
+
+# Changed blocks of more lines are replaced instead of diffed line by line
+DOC_DIFF_MAX_LINES = 2000
+
+# BeautifulSoup tree builders ordered from fastest to slowest
+PARSER_BACKENDS = ('lxml', 'html.parser', 'html5lib')
+
+# Installed packages whose versions change the parsed trees
+PARSING_PACKAGES = ('beautifulsoup4', 'lxml', 'html5lib', 'selectolax')
+
+def package_version(package: str) -> str:
+    """
+    Returns the installed version of a distribution, or 'missing'.
+    """
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return 'missing'
+
+def fastest_parser_backend() -> str:
+    """
+    Returns the fastest BeautifulSoup tree builder that is installed.
+    html.parser ships with Python and is always available.
+    """
+    for backend in PARSER_BACKENDS:
+        if backend == 'html.parser':
+            return backend
+        try:
+            __import__(backend)
+            return backend
+        except ImportError:
+            continue
+    return 'html.parser'
+
+class RegionMatcher:
+    """
+    SoupStrainer matcher for a list of page regions.
+    Each region is a (tag name, attrs) pair; a 'class' attr matches when it
+    is one of the element's classes, other attrs must match exactly.
+    Defined as a class rather than a closure so scrapers stay picklable.
+    """
+
+    def __init__(self, regions: List[Tuple[str, Dict[str, str]]]):
+        self.regions = regions
+
+    def __call__(self, name: str, attrs: Dict) -> bool:
+        for region_name, region_attrs in self.regions:
+            if name != region_name:
+                continue
+            for attr, value in region_attrs.items():
+                actual = attrs.get(attr)
+                if isinstance(actual, str) and attr == 'class':
+                    actual = actual.split()
+                if isinstance(actual, list) and value in actual:
+                    continue
+                if actual != value:
+                    break
+            else:
+                return True
+        return False
+
+class RegionStrainer(SoupStrainer):
+    """
+    SoupStrainer that only lets the given page regions into the tree.
+    beautifulsoup4 before 4.13 calls the RegionMatcher passed as name with
+    the tag name and attrs; 4.13 and later only pass the name to such a
+    callable and ask allow_tag_creation instead, which is overridden to
+    use the same matcher, so partial parsing works with both APIs.
+    """
+
+    def __init__(self, regions: List[Tuple[str, Dict[str, str]]]):
+        self.matcher = RegionMatcher(regions)
+        super().__init__(self.matcher)
+
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict]) -> bool:
+        return self.matcher(name, attrs or {})
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+class FieldRule:
+    """
+    One field of an ExtractionPlan: the value of the first element (in
+    document order) with the given tag and attrs, optionally only inside
+    the element matched by the `within` field. attribute selects an
+    attribute value instead of the stripped text; default is used when no
+    element matches.
+    """
+
+    def __init__(self, name: str, tag: str, attrs: Optional[Dict[str, str]] = None,
+                 attribute: Optional[str] = None, default: Any = None, within: Optional[str] = None):
+        self.name = name
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.attribute = attribute
+        self.default = default
+        self.within = within
+
+class ExtractionPlan:
+    """
+    Declarative extraction plan of a job board:
+    - card: (tag, attrs) of a listing card element
+    - fields: FieldRules extracted from each card
+    - body: (tag, attrs) of the job description on a detail page
+    - drop_tags: tags removed from the description before taking its text
+    The plan is compiled once per scraper into the lookup form of the
+    extraction engine (see compile).
+    """
+
+    def __init__(self, card: Tuple[str, Dict[str, str]], fields: List[FieldRule],
+                 body: Tuple[str, Dict[str, str]], drop_tags: List[str]):
+        self.card = card
+        self.fields = fields
+        self.body = body
+        self.drop_tags = drop_tags
+
+    def compile(self, engine: str) -> 'CompiledPlan':
+        """
+        Compiles the plan for 'beautifulsoup' or 'selectolax' trees.
+        """
+        if engine == 'selectolax':
+            return LexborPlan(self)
+        return SoupPlan(self)
+
+class CompiledPlan:
+    """
+    ExtractionPlan compiled for one tree type. Card fields are extracted
+    in a single traversal of the card subtree: rules are bucketed by tag
+    name and every element is checked only against the rules of its tag,
+    instead of running one subtree search per field.
+    Subclasses adapt the tree access (children, attributes, text).
+    """
+
+    def __init__(self, plan: ExtractionPlan):
+        self.plan = plan
+        self.fields = plan.fields
+        self.rules_by_tag: Dict[str, List[FieldRule]] = {}
+        for rule in plan.fields:
+            self.rules_by_tag.setdefault(rule.tag, []).append(rule)
+        # Attribute checks split into class membership and exact matches
+        self.checks = {
+            rule.name: (rule.attrs.get('class'), [(attr, value) for attr, value in rule.attrs.items() if attr != 'class'])
+            for rule in plan.fields
+        }
+
+    def matches(self, element: Any, rule: FieldRule) -> bool:
+        """
+        Checks the attrs of a rule whose tag already matched.
+        """
+        class_name, exact = self.checks[rule.name]
+        if class_name is not None and class_name not in self.classes(element):
+            return False
+        return all(self.attribute(element, attr) == value for attr, value in exact)
+
+    def is_inside(self, element: Any, container: Any, card: Any) -> bool:
+        """
+        Checks whether element is a descendant of container, walking up
+        the parents no further than the card.
+        """
+        node = self.parent(element)
+        while node is not None and not self.same(node, card):
+            if self.same(node, container):
+                return True
+            node = self.parent(node)
+        return False
+
+    def extract(self, card: Any) -> Dict[str, Any]:
+        """
+        Extracts every field of the plan from a card element.
+        Missing fields get the rule default.
+        """
+        found: Dict[str, Any] = {}
+        for element in self.descendants(card):
+            rules = self.rules_by_tag.get(self.tag(element))
+            if not rules:
+                continue
+            for rule in rules:
+                if rule.name in found or not self.matches(element, rule):
+                    continue
+                if rule.within and not (rule.within in found and self.is_inside(element, found[rule.within], card)):
+                    continue
+                found[rule.name] = element
+            if len(found) == len(self.fields):
+                break
+
+        values = {}
+        for rule in self.fields:
+            element = found.get(rule.name)
+            if element is None:
+                values[rule.name] = rule.default
+            elif rule.attribute:
+                values[rule.name] = self.attribute(element, rule.attribute)
+            else:
+                values[rule.name] = self.text(element)
+        return values
+
+class SoupPlan(CompiledPlan):
+    """
+    ExtractionPlan compiled for BeautifulSoup trees.
+    """
+
+    def __init__(self, plan: ExtractionPlan):
+        super().__init__(plan)
+        self.card_tag, self.card_attrs = plan.card
+        self.body_tag, self.body_attrs = plan.body
+
+    def cards(self, soup: BeautifulSoup) -> List[Any]:
+        return soup.find_all(self.card_tag, attrs=self.card_attrs)
+
+    def body_text(self, soup: BeautifulSoup) -> Optional[str]:
+        """
+        Returns the description text with drop_tags removed, or None when
+        the page has no description element.
+        """
+        content = soup.find(self.body_tag, attrs=self.body_attrs)
+        if not content:
+            return None
+        for element in content.find_all(self.plan.drop_tags):
+            element.decompose()
+        return content.get_text(separator='\n', strip=True)
+
+    def descendants(self, card: Any) -> Iterable[Any]:
+        return (element for element in card.descendants if element.name is not None)
+
+    def tag(self, element: Any) -> str:
+        return element.name
+
+    def classes(self, element: Any) -> List[str]:
+        return element.get('class') or []
+
+    def attribute(self, element: Any, name: str) -> Optional[str]:
+        return element.get(name)
+
+    def text(self, element: Any) -> str:
+        return element.get_text(strip=True)
+
+    def parent(self, element: Any) -> Any:
+        return element.parent
+
+    def same(self, a: Any, b: Any) -> bool:
+        return a is b
+
+class LexborPlan(CompiledPlan):
+    """
+    ExtractionPlan compiled for selectolax lexbor trees; the lookups become
+    CSS selectors. All card fields are combined into one selector list, so
+    lexbor walks the card once in C and only the candidate elements reach
+    the rule matching in Python.
+    """
+
+    def __init__(self, plan: ExtractionPlan):
+        super().__init__(plan)
+        self.card_selector = self.css(plan.card[0], plan.card[1])
+        self.body_selector = self.css(plan.body[0], plan.body[1])
+        self.drop_selector = ', '.join(plan.drop_tags)
+        selectors = {rule.name: self.css(rule.tag, rule.attrs) for rule in plan.fields}
+        self.fields_selector = ', '.join(
+            f"{selectors[rule.within]} {selectors[rule.name]}" if rule.within else selectors[rule.name]
+            for rule in plan.fields
+        )
+
+    @staticmethod
+    def css(tag: str, attrs: Dict[str, str]) -> str:
+        """
+        Builds the CSS selector of a (tag, attrs) pair.
+        """
+        selector = tag
+        for attr, value in attrs.items():
+            selector += f'.{value}' if attr == 'class' else f'[{attr}="{value}"]'
+        return selector
+
+    def cards(self, tree: Any) -> List[Any]:
+        return tree.css(self.card_selector)
+
+    def body_text(self, tree: Any) -> Optional[str]:
+        """
+        Returns the description text with drop_tags removed, or None when
+        the page has no description element.
+        """
+        content = tree.css_first(self.body_selector)
+        if not content:
+            return None
+        for element in content.css(self.drop_selector):
+            element.decompose()
+        return content.text(separator='\n', strip=True)
+
+    def descendants(self, card: Any) -> Iterable[Any]:
+        return card.css(self.fields_selector)
+
+    def tag(self, element: Any) -> str:
+        return element.tag
+
+    def classes(self, element: Any) -> List[str]:
+        return (element.attributes.get('class') or '').split()
+
+    def attribute(self, element: Any, name: str) -> Optional[str]:
+        return element.attributes.get(name)
+
+    def text(self, element: Any) -> str:
+        return element.text(strip=True)
+
+    def parent(self, element: Any) -> Any:
+        return element.parent
+
+    def same(self, a: Any, b: Any) -> bool:
+        return a.mem_id == b.mem_id
+
+class RegionEndDetector(HTMLParser):
+    """
+    Incremental HTML parser that watches a streamed response for the end
+    of a page region. Chunks are fed as they arrive; done becomes True once
+    the first element matching one of the regions has been closed, so the
+    rest of the page does not need to be downloaded.
+    """
+
+    def __init__(self, regions: List[Tuple[str, Dict[str, str]]], encoding: Optional[str] = None):
+        super().__init__(convert_charrefs=False)
+        self.matcher = RegionMatcher(regions)
+        self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self.region_tag: Optional[str] = None
+        self.depth = 0
+        self.done = False
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        """
+        Feeds a raw chunk of the response. Returns True once the region
+        has been closed.
+        """
+        if not self.done:
+            self.feed(self.decoder.decode(chunk))
+        return self.done
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if self.done:
+            return
+        if self.region_tag is None:
+            if self.matcher(tag, {name: value or '' for name, value in attrs}):
+                self.region_tag = tag
+                self.depth = 1
+        elif tag == self.region_tag:
+            self.depth += 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        # Self-closing tags never open a region
+        pass
+
+    def handle_endtag(self, tag: str):
+        if self.region_tag is not None and tag == self.region_tag and not self.done:
+            self.depth -= 1
+            if self.depth == 0:
+                self.done = True
 
 class JobBoardScraper(ABC):
     """
     Abstract base class for job board scrapers.
     This allows for easy extension to other job boards in the future.
     """
+
+    # Tree builder used by make_soup
+    parser = 'html.parser'
+
+    # Sample detail and listing pages used to check alternative parser
+    # backends and extraction engines
+    REFERENCE_FIXTURES: List[str] = []
+    LISTING_REFERENCE_FIXTURES: List[str] = []
+
+    # Page regions that are parsed into trees, everything else is skipped.
+    # None parses the whole page.
+    LISTING_REGIONS: Optional[List[Tuple[str, Dict[str, str]]]] = None
+    DETAIL_REGIONS: Optional[List[Tuple[str, Dict[str, str]]]] = None
     
     @abstractmethod
     def extract_job_text(self, soup: BeautifulSoup) -> str:
@@ -38,7 +513,297 @@ class JobBoardScraper(ABC):
         Extracts job description text from a BeautifulSoup object.
         """
         pass
+
+    @abstractmethod
+    def parse_listing(self, body: bytes, encoding: Optional[str] = None) -> Tuple[Optional[str], Optional[int], List[Optional[Dict]]]:
+        """
+        Abstract method that must be implemented by child classes.
+        Parses a raw listing page into its end-of-listing reason (None while
+        the listing continues), the total job count announced by the page
+        (or None) and the card dictionaries (None for unparsable cards).
+        """
+        pass
+
+    def listing_end_reason_raw(self, body: bytes, encoding: Optional[str] = None) -> Optional[str]:
+        """
+        Cheap end-of-listing check on the raw response body, so pagination
+        can stop without decoding or parsing the page.
+        Returns None (unknown) by default.
+        """
+        return None
+
+    def contains(self, body: bytes, encoding: Optional[str], text: str) -> bool:
+        """
+        Checks whether body contains text by searching for its encoded
+        bytes instead of decoding the whole body.
+        """
+        try:
+            return text.encode(encoding or 'utf-8') in body
+        except (UnicodeEncodeError, LookupError):
+            return text in self.decode(body, encoding)
+
+    def make_soup(self, body: bytes, encoding: Optional[str] = None,
+                  regions: Optional[List[Tuple[str, Dict[str, str]]]] = None,
+                  parser: Optional[str] = None) -> BeautifulSoup:
+        """
+        Builds the BeautifulSoup tree of a raw response body with parser
+        (default: the scraper's backend).
+        The raw bytes are handed to the tree builder together with the
+        known encoding, so no decoded copy of the page is made up front
+        (lxml decodes while parsing).
+        When regions are given, only those elements (with their whole
+        subtree) are parsed into the tree. html5lib cannot do partial
+        parsing and always builds the full tree.
+        """
+        parser = parser or self.parser
+        parse_only = RegionStrainer(regions) if regions and parser != 'html5lib' else None
+        return BeautifulSoup(body, parser, parse_only=parse_only, from_encoding=encoding or 'utf-8')
+
+    def decode(self, body: bytes, encoding: Optional[str] = None) -> str:
+        """
+        Decodes a raw response body, replacing undecodable bytes.
+        """
+        return body.decode(encoding or 'utf-8', errors='replace')
+
+    def parse_detail(self, body: bytes, encoding: Optional[str] = None) -> Dict:
+        """
+        Parses a raw detail page into plain job fields.
+        Tries the schema.org JobPosting JSON-LD block first and only builds
+        a tree for the DOM path when the block is missing or incomplete.
+        Returns only picklable values (never soup objects), so it can run
+        in a worker process.
+        """
+        fields = self.extract_job_posting(body, encoding) or {}
+        if not fields.get('title') or not fields.get('text'):
+            fields['text'] = self.extract_detail_text(body, encoding)
+        return fields
+
+    def extract_detail_text(self, body: bytes, encoding: Optional[str] = None) -> str:
+        """
+        DOM path: extracts the job description from the parsed detail page.
+        """
+        return self.extract_job_text(self.make_soup(body, encoding, self.DETAIL_REGIONS))
+
+    def extractor_version(self) -> str:
+        """
+        Returns a hash of everything that determines the fields parsed from
+        a detail page: the source of this scraper's classes, of the
+        extraction plan and region strainer classes and of the decoding
+        helpers, the JSON-LD pattern and DETAIL_FIELDS, the versions of the
+        parsing libraries, plus the engine and parser backend.
+        Used to invalidate the ParseCache whenever the extractors change.
+        """
+        sources = [inspect.getsource(cls) for cls in type(self).__mro__ if cls.__module__ == __name__]
+        sources += [inspect.getsource(cls) for cls in (FieldRule, ExtractionPlan, CompiledPlan, SoupPlan, LexborPlan,
+                                                       RegionMatcher, RegionStrainer)]
+        sources += [inspect.getsource(function) for function in (parse_detail_page, normalize_encoding,
+                                                                 charset_from_content_type, sniff_encoding)]
+        sources += [JSON_LD_PATTERN.pattern.decode('ascii'), repr(DETAIL_FIELDS)]
+        sources += [f"{package} {package_version(package)}" for package in PARSING_PACKAGES]
+        sources += [type(self).__name__, str(getattr(self, 'parser', ''))]
+        return hashlib.sha1('\n'.join(sources).encode('utf-8')).hexdigest()
+
+    def detail_end_detector(self, encoding: Optional[str] = None) -> Optional[RegionEndDetector]:
+        """
+        Returns a detector that tells a streaming fetch when the ad body of
+        a detail page has been received, or None when the scraper has no
+        detail regions and detail pages must be downloaded in full.
+        """
+        if not self.DETAIL_REGIONS:
+            return None
+        return RegionEndDetector(self.DETAIL_REGIONS, encoding)
+
+    def extract_job_posting(self, body: bytes, encoding: Optional[str] = None) -> Optional[Dict]:
+        """
+        Structured-data fast path: finds the schema.org JobPosting JSON-LD
+        block with a byte scan (no tree is built) and maps it to job fields:
+        title, company, location, text, date_posted, valid_through, salary
+        and employment_type.
+        Returns None when the page has no usable JobPosting block.
+        """
+        if b'ld+json' not in body:
+            return None
+
+        for match in JSON_LD_PATTERN.finditer(body):
+            raw = match.group(1)
+            try:
+                data = json.loads(raw.decode(encoding or 'utf-8', errors='replace'))
+            except ValueError:
+                continue
+            posting = self.find_job_posting(data)
+            if posting:
+                return self.job_posting_fields(posting)
+        return None
+
+    def find_job_posting(self, data: Any) -> Optional[Dict]:
+        """
+        Returns the first JobPosting object in a JSON-LD document, looking
+        into lists and @graph containers.
+        """
+        if isinstance(data, list):
+            for item in data:
+                posting = self.find_job_posting(item)
+                if posting:
+                    return posting
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        types = data.get('@type')
+        if types == 'JobPosting' or (isinstance(types, list) and 'JobPosting' in types):
+            return data
+        return self.find_job_posting(data.get('@graph', []))
+
+    def job_posting_fields(self, posting: Dict) -> Dict:
+        """
+        Maps a JobPosting object to job fields, leaving out missing values.
+        """
+        organization = posting.get('hiringOrganization')
+        locations = posting.get('jobLocation')
+        if isinstance(locations, dict):
+            locations = [locations]
+        localities = []
+        for location in locations or []:
+            address = location.get('address', {}) if isinstance(location, dict) else {}
+            if isinstance(address, dict):
+                locality = address.get('addressLocality') or address.get('addressRegion')
+                if locality and locality not in localities:
+                    localities.append(locality)
+        employment_type = posting.get('employmentType')
+        if isinstance(employment_type, list):
+            employment_type = ', '.join(employment_type)
+
+        fields = {
+            'title': posting.get('title'),
+            'company': organization.get('name') if isinstance(organization, dict) else organization,
+            'location': ', '.join(localities),
+            'text': self.html_to_text(posting.get('description') or ''),
+            'date_posted': posting.get('datePosted'),
+            'valid_through': posting.get('validThrough'),
+            'salary': self.format_salary(posting.get('baseSalary')),
+            'employment_type': employment_type,
+        }
+        return {key: value for key, value in fields.items() if value}
+
+    def format_salary(self, salary: Any) -> Optional[str]:
+        """
+        Formats a schema.org MonetaryAmount as e.g. "50000–80000 CZK/MONTH".
+        """
+        if not isinstance(salary, dict):
+            return str(salary) if salary else None
+        value = salary.get('value')
+        unit = None
+        if isinstance(value, dict):
+            unit = value.get('unitText')
+            if value.get('minValue') is not None and value.get('maxValue') is not None:
+                amount = f"{value['minValue']}–{value['maxValue']}"
+            else:
+                amount = value.get('value', value.get('minValue', value.get('maxValue')))
+        else:
+            amount = value
+        if amount is None:
+            return None
+        formatted = f"{amount} {salary.get('currency', '')}".strip()
+        return f"{formatted}/{unit}" if unit else formatted
+
+    def html_to_text(self, fragment: str) -> str:
+        """
+        Converts an HTML fragment (such as a JSON-LD description) to text
+        with regular expressions: block elements become line breaks, other
+        tags are dropped and entities are unescaped.
+        """
+        text = re.sub(r'(?i)<br\s*/?>|</(p|div|li|h[1-6]|tr|ul|ol|table)\s*>', '\n', fragment)
+        text = re.sub(r'<[^>]+>', '', text)
+        text = unescape(text)
+        return self.clean_text('\n'.join(line.strip() for line in text.split('\n')))
+
+    def verify_parser(self) -> bool:
+        """
+        Startup check for the configured parser backend: extract_job_text
+        must give the same output as with html.parser on every reference
+        fixture. Falls back to html.parser on any difference or when the
+        configured backend raises; logs an error when html.parser itself
+        fails, since the backend cannot be verified then.
+        Logs the measured parse time of both backends.
+        Returns True if the configured backend was kept and verified.
+        """
+        if self.parser == 'html.parser' or not self.REFERENCE_FIXTURES:
+            return True
+
+        timings = {}
+        outputs = {}
+        for backend in (self.parser, 'html.parser'):
+            # Best of three runs, so import and warm-up costs do not count
+            timings[backend] = float('inf')
+            for _ in range(3):
+                started = time.perf_counter()
+                try:
+                    outputs[backend] = [
+                        self.extract_job_text(self.make_soup(fixture.encode('utf-8'), 'utf-8', self.DETAIL_REGIONS, backend))
+                        for fixture in self.REFERENCE_FIXTURES
+                    ]
+                except Exception as e:
+                    logging.warning(f"Parser backend {backend} failed on reference fixtures: {str(e)}")
+                    outputs[backend] = None
+                    break
+                timings[backend] = min(timings[backend], time.perf_counter() - started)
+
+        if outputs['html.parser'] is None:
+            if outputs[self.parser] is None:
+                logging.error(f"Parser backends {self.parser} and html.parser both failed on reference fixtures")
+                self.parser = 'html.parser'
+            else:
+                logging.error(f"Parser backend html.parser failed on reference fixtures, "
+                              f"using {self.parser} without verification")
+            return False
+
+        if outputs[self.parser] != outputs['html.parser']:
+            reason = 'failed' if outputs[self.parser] is None else 'differs from html.parser'
+            logging.warning(f"Parser backend {self.parser} {reason} on reference fixtures, "
+                            f"falling back to html.parser")
+            self.parser = 'html.parser'
+            return False
+
+        logging.info(f"Using parser backend {self.parser} ({timings[self.parser] * 1000:.1f} ms vs. "
+                     f"{timings['html.parser'] * 1000:.1f} ms for html.parser on reference fixtures)")
+        return True
         
+    def verify_engine(self, reference: 'JobBoardScraper') -> bool:
+        """
+        Equivalence check of an alternative extraction engine: parses the
+        reference fixtures of reference with both scrapers and compares
+        listing results and detail fields one by one.
+        Logs every differing field and returns True if all of them match.
+        """
+        mismatches = []
+        for number, fixture in enumerate(reference.LISTING_REFERENCE_FIXTURES):
+            body = fixture.encode('utf-8')
+            expected_end, expected_count, expected_cards = reference.parse_listing(body, 'utf-8')
+            actual_end, actual_count, actual_cards = self.parse_listing(body, 'utf-8')
+            if actual_end != expected_end:
+                mismatches.append(f"listing {number} end reason: {actual_end!r} != {expected_end!r}")
+            if actual_count != expected_count:
+                mismatches.append(f"listing {number} total count: {actual_count!r} != {expected_count!r}")
+            if len(actual_cards) != len(expected_cards):
+                mismatches.append(f"listing {number} card count: {len(actual_cards)} != {len(expected_cards)}")
+            for card_number, (actual, expected) in enumerate(zip(actual_cards, expected_cards)):
+                for field in set(actual or {}) | set(expected or {}):
+                    if (actual or {}).get(field) != (expected or {}).get(field):
+                        mismatches.append(f"listing {number} card {card_number} {field}: "
+                                          f"{(actual or {}).get(field)!r} != {(expected or {}).get(field)!r}")
+
+        for number, fixture in enumerate(reference.REFERENCE_FIXTURES):
+            body = fixture.encode('utf-8')
+            expected = reference.parse_detail(body, 'utf-8')
+            actual = self.parse_detail(body, 'utf-8')
+            for field in set(actual) | set(expected):
+                if actual.get(field) != expected.get(field):
+                    mismatches.append(f"detail {number} {field}: {actual.get(field)!r} != {expected.get(field)!r}")
+
+        for mismatch in mismatches:
+            logging.warning(f"{type(self).__name__} differs from {type(reference).__name__}: {mismatch}")
+        return not mismatches
+
     def clean_text(self, text: str) -> str:
         """
         Cleans and formats the extracted text:
@@ -55,286 +820,2231 @@ class JobBoardScraper(ABC):
         text = '\n'.join(line for line in text.split('\n') if line.strip())  # Remove empty lines
         return text
 
+def parse_detail_page(scraper: JobBoardScraper, body: bytes, encoding: Optional[str] = None) -> Dict:
+    """
+    Process-pool entry point: parses a detail page with the given scraper.
+    Kept at module level so it can be pickled for worker processes.
+    """
+    return scraper.parse_detail(body, encoding)
+
 class JobsCzScraper(JobBoardScraper):
     """
     Specific implementation for jobs.cz website.
     Inherits from JobBoardScraper and implements its abstract methods.
     """
     
-    def __init__(self):
+    REFERENCE_FIXTURES = [
+        """<html><head><title>Python Developer</title></head><body>
+        <nav><a href="/">Jobs.cz</a></nav>
+        <div data-jobad="body">
+          <h1>Python Developer</h1>
+          <p>Hledáme <strong>Python</strong> vývojáře do&nbsp;našeho týmu.</p>
+          <script>window.dataLayer = [];</script>
+          <h3>Co budete dělat</h3>
+          <ul><li>Vývoj backendu v Django</li><li>Code review &amp; testy</li></ul>
+          <p>Nabízíme:<br>5 týdnů dovolené<br/>Home office</p>
+          <style>.x{color:red}</style>
+        </div>
+        <footer>© Jobs.cz</footer>
+        </body></html>""",
+        """<html><body><div data-jobad="body"><header>Inzerát</header>
+        <p>Požadujeme
+        zkušenosti    s   FastAPI a&nbsp;PostgreSQL.</p>
+        <ol><li><p>Python 3.12</p></li><li><p>Docker, Kubernetes</p></li></ol>
+        <table><tr><td>Mzda</td><td>60&nbsp;000 – 90&nbsp;000 Kč</td></tr></table>
+        </div></body></html>""",
+        """<html><body><div class="Other">Bez popisu</div></body></html>""",
+    ]
+    LISTING_REFERENCE_FIXTURES = [
+        """<html><body><nav>Menu</nav>
+        <h1 class="SearchHeader__title">1 234 nabídek práce</h1>
+        <div class="SearchResultList">
+          <article class="SearchResultCard">
+            <header><h2 class="SearchResultCard__title">
+              <a class="link-primary SearchResultCard__titleLink" href="/rpd/2000123456/?searchId=abc&amp;rps=1">Senior Python  Developer</a>
+            </h2></header>
+            <footer><ul>
+              <li><span translate="no">Firma &amp; syn s.r.o.</span></li>
+              <li data-test="serp-locality">Praha – Karlín</li>
+            </ul></footer>
+          </article>
+          <article class="SearchResultCard SearchResultCard--highlighted">
+            <h2 class="SearchResultCard__title"><a class="link-primary" href="https://www.jobs.cz/rpd/2000654321/">Data Engineer</a></h2>
+            <ul><li><span translate="no">Data a.s.</span></li></ul>
+          </article>
+        </div>
+        <footer>© Jobs.cz</footer></body></html>""",
+        """<html><body><div class="Alert">Zadaná stránka už není dostupná</div></body></html>""",
+        """<html><body><h1 class="SearchHeader__title">0 nabídek</h1><div class="SearchNoResults">Nic nenalezeno</div></body></html>""",
+        """<html><body><div class="SearchResultList"></div></body></html>""",
+    ]
+    
+    LISTING_REGIONS = [
+        ('article', {'class': 'SearchResultCard'}),
+        ('h1', {'class': 'SearchHeader__title'}),
+        ('div', {'class': 'SearchNoResults'}),
+        ('div', {'class': 'SearchResultList'}),
+    ]
+    DETAIL_REGIONS = [
+        ('div', {'data-jobad': 'body'}),
+    ]
+    NOT_AVAILABLE_MESSAGE = 'Zadaná stránka už není dostupná'
+
+    EXTRACTION_PLAN = ExtractionPlan(
+        card=('article', {'class': 'SearchResultCard'}),
+        fields=[
+            FieldRule('title', 'h2', {'class': 'SearchResultCard__title'}),
+            FieldRule('url', 'a', {'class': 'link-primary'}, attribute='href', within='title'),
+            FieldRule('company', 'span', {'translate': 'no'}, default=""),
+            FieldRule('location', 'li', {'data-test': 'serp-locality'}, default="Remote"),
+        ],
+        body=('div', {'data-jobad': 'body'}),
+        drop_tags=['script', 'style', 'nav', 'header', 'footer'],
+    )
+    ENGINE = 'beautifulsoup'
+    
+    def __init__(self, queries: Optional[List[str]] = None, parser: Optional[str] = None):
         """
-        Initialize with base URL and search parameters.
-        Currently only searches for Python jobs.
+        Initialize with base URL and the list of search queries.
+        Searches for Python jobs when no queries are given.
+        parser selects the BeautifulSoup tree builder, defaulting to the
+        fastest one installed. The extraction plan is compiled for the
+        engine of this scraper.
         """
         self.base_url = "https://www.jobs.cz/prace/"
-        self.search_params = {"q[]": "python"}
+        self.queries = queries or ["python"]
+        self.parser = parser or fastest_parser_backend()
+        if self.parser not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend: {self.parser}")
+        self.plan = self.EXTRACTION_PLAN.compile(self.ENGINE)
 
-    def extract_job_text(self, soup: BeautifulSoup) -> str:
+    def listing_url(self, page: int, query: Optional[str] = None) -> str:
         """
-        Extracts job description from jobs.cz specific HTML structure.
-        Removes unwanted elements like scripts, styles, nav, etc.
-        Returns cleaned job description text.
+        Builds the URL of the given listing page (pages are numbered from 1)
+        for query, defaulting to the first configured query.
         """
-        content_div = soup.find('div', attrs={'data-jobad': 'body'})
-        if not content_div:
-            return ""
+        url = f"{self.base_url}?q[]={quote_plus(query or self.queries[0])}"
+        if page > 1:
+            url += f"&page={page}"
+        return url
+
+    def parse_listing(self, body: bytes, encoding: Optional[str] = None) -> Tuple[Optional[str], Optional[int], List[Optional[Dict]]]:
+        """
+        Parses a listing page into its end-of-listing reason, the total job
+        count from the header and the card dictionaries (None for cards
+        that could not be parsed).
+        """
+        soup = self.make_soup(body, encoding, self.LISTING_REGIONS)
+        job_items = self.plan.cards(soup)
+        end_reason = self.listing_end_reason(soup, job_items, self.contains(body, encoding, self.NOT_AVAILABLE_MESSAGE))
+        cards = [] if end_reason else [self.extract_card_details(job_item) for job_item in job_items]
+        return end_reason, self.parse_total_count(soup), cards
+
+    def extract_card_details(self, job_item: Any) -> Optional[Dict]:
+        """
+        Extracts the fields available directly on a SearchResultCard
+        with the compiled extraction plan:
+        - Title
+        - Company
+        - Location
+        - URL
+        - Job ID
+        Returns dictionary with an empty 'text' field or None if extraction fails.
+        """
+        try:
+            fields = self.plan.extract(job_item)
+            if fields['title'] is None:
+                logging.warning("No title element found in job listing")
+                return None
+
+            url = fields['url']
+            if url is None:
+                logging.warning("No URL element found in job listing")
+                return None
+            if not url.startswith('http'):
+                url = f"https://www.jobs.cz{url}"
+                
+            # Extract job ID from URL
+            job_id = None
+            id_match = re.search(r'/rpd/(\d+)/', url)
+            if id_match:
+                job_id = id_match.group(1)
+            else:
+                logging.warning(f"Could not extract job ID from URL: {url}")
             
-        # Remove unwanted HTML elements
-        for element in content_div.find_all(['script', 'style', 'nav', 'header', 'footer']):
-            element.decompose()
+            return {
+                'title': fields['title'],
+                'company': fields['company'],
+                'location': fields['location'],
+                'url': url,
+                'job_id': job_id,
+                'text': ""
+            }
             
-        return self.clean_text(content_div.get_text(separator='\n', strip=True))
+        except Exception as e:
+            logging.warning(f"Error extracting job details: {str(e)}")
+            return None
+
+    def listing_end_reason(self, soup: BeautifulSoup, job_items: List[BeautifulSoup],
+                           not_available: Optional[bool] = None) -> Optional[str]:
+        """
+        Checks a fetched listing page for last page indicators:
+        - "Page not available" message
+        - No results message
+        - Empty results container
+        not_available is the result of looking the message up in the raw
+        body, since a soup limited to the listing regions does not contain
+        it; when None the soup is searched.
+        Returns a short reason when the listing has ended, None otherwise.
+        """
+        if not_available is None:
+            not_available = soup.find(string=lambda text: self.NOT_AVAILABLE_MESSAGE in str(text) if text else False)
+        if not_available:
+            return "page not available"
+
+        if not job_items:
+            if soup.find('div', class_='SearchNoResults'):
+                return "no results"
+            results_container = soup.find('div', class_='SearchResultList')
+            if results_container and len(results_container.find_all('article')) == 0:
+                return "empty results container"
+            return "no job items"
+
+        return None
+
+    def parse_total_count(self, soup: BeautifulSoup) -> Optional[int]:
+        """
+        Parses the total number of jobs from the SearchHeader__title heading.
+        Returns None when the heading is missing or has no number.
+        """
+        total_count_elem = soup.find('h1', class_='SearchHeader__title')
+        if not total_count_elem:
+            return None
+        try:
+            return int(''.join(filter(str.isdigit, total_count_elem.text)))
+        except ValueError:
+            logging.warning("Could not parse total job count")
+            return None
+
+    def listing_end_reason_raw(self, body: bytes, encoding: Optional[str] = None) -> Optional[str]:
+        """
+        Cheap check of the same last page indicators as listing_end_reason
+        on the raw body, so the listing fetch stage can stop paginating
+        without decoding or parsing the page. Like listing_end_reason, the
+        no-results marker only counts when the page has no job cards (it
+        may also appear in stylesheets or scripts of a full page).
+        Returns a short reason when the listing has ended, None otherwise.
+        """
+        if self.contains(body, encoding, self.NOT_AVAILABLE_MESSAGE):
+            return "page not available"
+        if self.contains(body, encoding, 'SearchResultCard'):
+            return None
+        if self.contains(body, encoding, 'SearchNoResults'):
+            return "no results"
+        return "no job items"
+
+    def extract_job_text(self, soup: Any) -> str:
+        """
+        Extracts job description from jobs.cz specific HTML structure.
+        Removes unwanted elements like scripts, styles, nav, etc.
+        (the plan's drop_tags).
+        Returns cleaned job description text.
+        """
+        text = self.plan.body_text(soup)
+        if text is None:
+            return ""
+        return self.clean_text(text)
+
+class SelectolaxJobsCzScraper(JobsCzScraper):
+    """
+    Alternative jobs.cz implementation built on the C-backed lexbor HTML
+    parser from selectolax and its CSS selectors instead of BeautifulSoup.
+    Produces the same listing cards and job text as JobsCzScraper, which
+    verify_engine checks on the reference fixtures.
+    """
+
+    ENGINE = 'selectolax'
+
+    def __init__(self, queries: Optional[List[str]] = None, parser: Optional[str] = None):
+        """
+        Initialize like JobsCzScraper. Raises ImportError when selectolax
+        is not installed.
+        """
+        if LexborHTMLParser is None:
+            raise ImportError("selectolax is not installed")
+        super().__init__(queries, parser)
+
+    def verify_parser(self) -> bool:
+        """
+        The BeautifulSoup parser backend is not used by this engine.
+        """
+        return True
+
+    def lexbor_input(self, body: bytes, encoding: Optional[str] = None) -> Any:
+        """
+        Returns what to feed to lexbor: the raw bytes for UTF-8 pages
+        (lexbor reads UTF-8 natively), the decoded text otherwise.
+        """
+        if normalize_encoding(encoding or 'utf-8') == 'utf-8':
+            return body
+        return self.decode(body, encoding)
+
+    def parse_listing(self, body: bytes, encoding: Optional[str] = None) -> Tuple[Optional[str], Optional[int], List[Optional[Dict]]]:
+        """
+        Parses a listing page into its end-of-listing reason, the total job
+        count from the header and the card dictionaries (None for cards
+        that could not be parsed).
+        """
+        tree = LexborHTMLParser(self.lexbor_input(body, encoding))
+        job_items = self.plan.cards(tree)
+        end_reason = self.listing_end_reason(tree, job_items, self.contains(body, encoding, self.NOT_AVAILABLE_MESSAGE))
+        cards = [] if end_reason else [self.extract_card_details(job_item) for job_item in job_items]
+        return end_reason, self.parse_total_count(tree), cards
+
+    def listing_end_reason(self, tree: Any, job_items: List[Any], not_available: Optional[bool] = None) -> Optional[str]:
+        """
+        Same last page indicators as JobsCzScraper.listing_end_reason,
+        checked on the lexbor tree.
+        """
+        if not_available is None:
+            not_available = self.NOT_AVAILABLE_MESSAGE in (tree.html or "")
+        if not_available:
+            return "page not available"
+
+        if not job_items:
+            if tree.css_first('div.SearchNoResults'):
+                return "no results"
+            results_container = tree.css_first('div.SearchResultList')
+            if results_container and not results_container.css('article'):
+                return "empty results container"
+            return "no job items"
+
+        return None
+
+    def parse_total_count(self, tree: Any) -> Optional[int]:
+        """
+        Parses the total number of jobs from the SearchHeader__title heading.
+        """
+        total_count_elem = tree.css_first('h1.SearchHeader__title')
+        if not total_count_elem:
+            return None
+        try:
+            return int(''.join(filter(str.isdigit, total_count_elem.text())))
+        except ValueError:
+            logging.warning("Could not parse total job count")
+            return None
+
+    def extract_detail_text(self, body: bytes, encoding: Optional[str] = None) -> str:
+        """
+        DOM path: extracts the job description from the lexbor tree.
+        """
+        return self.extract_job_text(LexborHTMLParser(self.lexbor_input(body, encoding)))
+
+# Extraction engines selectable at runtime
+EXTRACTION_ENGINES = {
+    'beautifulsoup': JobsCzScraper,
+    'selectolax': SelectolaxJobsCzScraper,
+}
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that reports whether each request was sent over a freshly
+    opened connection or over a pooled keep-alive connection.
+    """
+
+    def __init__(self, transport: 'HttpTransport', **kwargs):
+        self.transport = transport
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # urllib3 counts opened connections per host pool, so a growing
+        # counter means this request needed a new TCP+TLS handshake
+        pool = self.poolmanager.connection_from_url(request.url)
+        opened_before = pool.num_connections
+        response = super().send(request, **kwargs)
+        self.transport.record_connection(reused=pool.num_connections == opened_before)
+        return response
+
+class FetchedPage:
+    """
+    Body and metadata of a fetched (or cached) HTTP response.
+    """
+
+    def __init__(self, url: str, body: bytes, encoding: Optional[str] = None,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None, from_cache: bool = False,
+                 truncated: bool = False, encoding_source: Optional[str] = None):
+        self.url = url
+        self.body = body
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.from_cache = from_cache
+        self.truncated = truncated
+        self.encoding_source = encoding_source
+
+    @property
+    def text(self) -> str:
+        """
+        Returns the body decoded with the response encoding.
+        """
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+class HttpCache:
+    """
+    On-disk HTTP response cache used by HttpTransport.
+    Stores response bodies together with their ETag / Last-Modified
+    validators. Fresh entries are served without a request, stale ones are
+    revalidated with a conditional GET where a 304 counts as a hit.
+    Listing and detail pages get separate TTLs and the cache is kept under
+    max_bytes by evicting the least recently used entries.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 100 * 1024 * 1024,
+                 listing_ttl: int = 300, detail_ttl: int = 12 * 3600,
+                 detail_pattern: str = r'/rpd/\d+/'):
+        """
+        Loads the cache index from directory, creating it when needed.
+        URLs matching detail_pattern use detail_ttl seconds of freshness,
+        all other URLs use listing_ttl.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.listing_ttl = listing_ttl
+        self.detail_ttl = detail_ttl
+        self.detail_pattern = re.compile(detail_pattern)
+        self.index_path = os.path.join(directory, 'index.json')
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not load HTTP cache index: {str(e)}")
+
+    def key(self, url: str) -> str:
+        """
+        Returns the file name used for the body of url.
+        """
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def ttl(self, url: str) -> int:
+        """
+        Returns the freshness lifetime for the URL class of url.
+        """
+        return self.detail_ttl if self.detail_pattern.search(url) else self.listing_ttl
+
+    def lookup(self, url: str, partial: bool = False) -> Optional[Dict]:
+        """
+        Returns the cache entry for url if its body is still on disk.
+        Entries holding a streamed page that was cut off after the ad body
+        are only returned when partial bodies are acceptable, so a full
+        fetch never revalidates (and keeps serving) the truncated body.
+        """
+        with self._lock:
+            entry = self.entries.get(self.key(url))
+            if entry and not os.path.exists(os.path.join(self.directory, self.key(url))):
+                del self.entries[self.key(url)]
+                return None
+            if entry and entry.get('truncated') and not partial:
+                return None
+            return entry
+
+    def is_fresh(self, url: str, entry: Dict) -> bool:
+        """
+        Checks whether entry can be served without revalidation.
+        """
+        return time.time() - entry['stored_at'] < self.ttl(url)
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """
+        Builds If-None-Match / If-Modified-Since headers from a cache entry.
+        """
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load(self, url: str, entry: Dict, revalidated: bool = False) -> FetchedPage:
+        """
+        Reads a cached body from disk and counts the hit.
+        A revalidated entry gets a fresh TTL.
+        """
+        with open(os.path.join(self.directory, self.key(url)), 'rb') as f:
+            body = f.read()
+        with self._lock:
+            entry['last_used'] = time.time()
+            if revalidated:
+                entry['stored_at'] = entry['last_used']
+                self.revalidated += 1
+            else:
+                self.hits += 1
+        return FetchedPage(url, body, entry.get('encoding'), entry.get('etag'), entry.get('last_modified'),
+                           from_cache=True, truncated=entry.get('truncated', False))
+
+    def store(self, page: FetchedPage):
+        """
+        Writes a fetched page to the cache and evicts old entries if the
+        cache grows over max_bytes. Pages without validators are still cached
+        for their TTL.
+        """
+        key = self.key(page.url)
+        now = time.time()
+        try:
+            with open(os.path.join(self.directory, key), 'wb') as f:
+                f.write(page.body)
+        except OSError as e:
+            logging.warning(f"Could not write HTTP cache entry for {page.url}: {str(e)}")
+            return
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = {
+                'url': page.url,
+                'etag': page.etag,
+                'last_modified': page.last_modified,
+                'encoding': page.encoding,
+                'truncated': page.truncated,
+                'size': len(page.body),
+                'stored_at': now,
+                'last_used': now,
+            }
+            self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits max_bytes.
+        Must be called with the lock held.
+        """
+        total = sum(entry['size'] for entry in self.entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            try:
+                os.remove(os.path.join(self.directory, key))
+            except OSError:
+                pass
+            del self.entries[key]
+            total -= entry['size']
+            if total <= self.max_bytes:
+                break
+
+    def save(self):
+        """
+        Writes the cache index atomically to disk.
+        """
+        with self._lock:
+            tmp_path = f"{self.index_path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                logging.warning(f"Could not save HTTP cache index: {str(e)}")
+
+    def log_stats(self):
+        """
+        Logs hit / revalidation / miss counts.
+        """
+        total = self.hits + self.revalidated + self.misses
+        hit_rate = (self.hits + self.revalidated) / total * 100 if total else 0.0
+        logging.info(f"HTTP cache: {self.hits} fresh hits, {self.revalidated} revalidated (304), "
+                     f"{self.misses} misses, hit rate {hit_rate:.1f}%")
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter shared by every sync and async fetch.
+    Allows requests_per_second on average with bursts of up to burst
+    requests. Uses AIMD: the rate is halved when the server answers
+    429/503 (honouring Retry-After) and grows back additively towards the
+    configured budget after a run of successful responses.
+    A burst of throttled responses from requests that were already in
+    flight counts as one throttling event: the rate is halved at most once
+    per interval at the reduced rate (or per Retry-After pause).
+    """
+
+    def __init__(self, requests_per_second: float = 4.0, burst: int = 4,
+                 min_rate: float = 0.1, increase_step: float = 0.5, success_threshold: int = 20):
+        """
+        Initialize a full bucket with the configured budget.
+        increase_step is added to the rate after success_threshold
+        consecutive successful responses, up to requests_per_second.
+        """
+        self.max_rate = requests_per_second
+        self.rate = requests_per_second
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self.success_threshold = success_threshold
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.decrease_hold_until = 0.0
+        self.successes = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes one token from the bucket and returns how many seconds the
+        caller has to wait before sending its request. The bucket may go
+        negative, which queues callers fairly behind each other.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def acquire(self):
+        """
+        Blocks the calling thread until a request may be sent.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Suspends the calling coroutine until a request may be sent.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """
+        Records a successful response and speeds up after a sustained run.
+        """
+        with self._lock:
+            self.successes += 1
+            if self.successes >= self.success_threshold and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self.successes = 0
+                logging.info(f"Rate limiter: speeding up to {self.rate:.2f} requests/s")
+
+    def on_throttled(self, retry_after: Optional[str] = None):
+        """
+        Records a 429/503 response: halves the rate and pauses all callers
+        for Retry-After seconds when the server sends the header.
+        Responses arriving before the previous decrease has taken effect
+        only extend the pause.
+        """
+        delay = self.parse_retry_after(retry_after)
+        with self._lock:
+            now = time.monotonic()
+            self.successes = 0
+            self.tokens = min(self.tokens, 0.0)
+            if delay:
+                self.paused_until = max(self.paused_until, now + delay)
+            if now < self.decrease_hold_until:
+                return
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.decrease_hold_until = now + max(1 / self.rate, delay or 0.0)
+        logging.warning(f"Rate limiter: server throttled us, slowing down to {self.rate:.2f} requests/s"
+                        + (f" and pausing {delay:.0f}s" if delay else ""))
+
+    def parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """
+        Parses a Retry-After header given either in seconds or as HTTP date.
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+class FetchError(Exception):
+    """
+    Raised by HttpTransport when a URL cannot be fetched.
+    retryable tells whether trying again may help (timeouts, connection
+    resets, 5xx, 429) or not (404 and other client errors).
+    """
+
+    def __init__(self, url: str, message: str, status: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.url = url
+        self.status = status
+        self.retryable = retryable
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed fetch (or Google Docs call) is retried.
+    Uses exponential backoff with full jitter and a per-run retry budget
+    shared by all requests, so a sick upstream cannot multiply run time.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0, budget: int = 50):
+        """
+        max_attempts counts the first try, budget caps the total number of
+        retries across the whole run.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def classify(self, url: str, error: Exception) -> FetchError:
+        """
+        Wraps a transport exception into a FetchError with retryable set
+        according to its type or HTTP status.
+        """
+        if isinstance(error, FetchError):
+            return error
+
+        status = None
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+        elif isinstance(error, aiohttp.ClientResponseError):
+            status = error.status
+        elif getattr(getattr(error, 'resp', None), 'status', None) is not None:
+            # googleapiclient HttpError
+            status = int(error.resp.status)
+
+        if status is not None:
+            retryable = status == 429 or status >= 500
+        else:
+            retryable = isinstance(error, (
+                requests.Timeout,
+                requests.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                aiohttp.ClientConnectionError,
+                aiohttp.ClientPayloadError,
+                asyncio.TimeoutError,
+                TimeoutError,
+                ConnectionError,
+            ))
+        return FetchError(url, str(error) or type(error).__name__, status, retryable)
+
+    def should_retry(self, error: FetchError, attempt: int) -> bool:
+        """
+        Returns True and consumes one unit of the retry budget if a request
+        that failed on its attempt-th try should be tried again.
+        """
+        if not error.retryable or attempt >= self.max_attempts:
+            return False
+        with self._lock:
+            if self.retries >= self.budget:
+                logging.warning(f"Retry budget of {self.budget} exhausted, giving up on {error.url}")
+                return False
+            self.retries += 1
+            return True
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the jittered delay before retry number attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+class HttpTransport:
+    """
+    Shared HTTP transport owned by JobScraper.
+    Keeps one persistent requests.Session for synchronous fetches and builds
+    aiohttp sessions with the same pool size for the async engine, so
+    listing and detail pages reuse keep-alive connections.
+    """
+
+    def __init__(self, headers: Dict[str, str], pool_size: int = 10, timeout: int = 10,
+                 cache: Optional[HttpCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        """
+        Initialize the persistent session with a connection pool of pool_size
+        connections per host and counters for new vs. reused connections.
+        When cache is given, responses are served from and stored in it.
+        Every request that reaches the network is paced by rate_limiter
+        and failed requests are retried according to retry_policy.
+        """
+        self.headers = headers
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.streamed_pages = 0
+        self.truncated_pages = 0
+        self.bytes_saved = 0
+        self.encoding_sources: Dict[str, int] = {}
+        self.fallback_encoding_urls: List[str] = []
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = CountingHTTPAdapter(self, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def record_connection(self, reused: bool):
+        """
+        Updates the connection counters. Called from both the sync adapter
+        and the aiohttp trace hooks, possibly from different threads.
+        """
+        with self._lock:
+            if reused:
+                self.reused_connections += 1
+            else:
+                self.new_connections += 1
+
+    def record_status(self, status: int, retry_after: Optional[str]):
+        """
+        Feeds the response status back into the rate limiter.
+        """
+        if status in (429, 503):
+            self.rate_limiter.on_throttled(retry_after)
+        elif status < 500:
+            self.rate_limiter.on_success()
+
+    def fetch(self, url: str, stream_until: Optional[Callable[[Optional[str]], Optional[RegionEndDetector]]] = None) -> FetchedPage:
+        """
+        Fetches url over the pooled session, going through the HTTP cache
+        when one is configured. Retryable failures are retried with backoff.
+        When stream_until is given, the response is streamed and the
+        download stops early once the detector it returns is done
+        (see fetch_once).
+        Raises FetchError when the page cannot be fetched.
+        """
+        attempt = 1
+        while True:
+            try:
+                return self.fetch_once(url, stream_until)
+            except Exception as e:
+                error = self.retry_policy.classify(url, e)
+                if not self.retry_policy.should_retry(error, attempt):
+                    raise error from e
+                delay = self.retry_policy.backoff(attempt)
+                logging.warning(f"Attempt {attempt} for {url} failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    async def fetch_async(self, session: aiohttp.ClientSession, url: str,
+                          stream_until: Optional[Callable[[Optional[str]], Optional[RegionEndDetector]]] = None) -> FetchedPage:
+        """
+        Async counterpart of fetch using a session from create_async_session.
+        """
+        attempt = 1
+        while True:
+            try:
+                return await self.fetch_once_async(session, url, stream_until)
+            except Exception as e:
+                error = self.retry_policy.classify(url, e)
+                if not self.retry_policy.should_retry(error, attempt):
+                    raise error from e
+                delay = self.retry_policy.backoff(attempt)
+                logging.warning(f"Attempt {attempt} for {url} failed ({error}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def fetch_once(self, url: str,
+                   stream_until: Optional[Callable[[Optional[str]], Optional[RegionEndDetector]]] = None) -> FetchedPage:
+        """
+        Single fetch attempt over the pooled session through the HTTP cache.
+        In streaming mode the body is read in STREAM_CHUNK_SIZE chunks and
+        fed to the detector created by stream_until(encoding); once it is
+        done the connection is closed and the rest of the page is skipped.
+        Raises on HTTP and network errors.
+        """
+        entry = self.cache.lookup(url, partial=stream_until is not None) if self.cache else None
+        if entry and self.cache.is_fresh(url, entry):
+            return self.cache.load(url, entry)
+
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+        self.rate_limiter.acquire()
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=stream_until is not None) as response:
+            self.record_status(response.status_code, response.headers.get('Retry-After'))
+            if response.status_code == 304 and entry:
+                return self.cache.load(url, entry, revalidated=True)
+            response.raise_for_status()
+
+            declared = charset_from_content_type(response.headers.get('Content-Type'))
+            detector = stream_until(declared) if stream_until else None
+            truncated = False
+            if detector:
+                body = bytearray()
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    body += chunk
+                    if detector.feed_bytes(chunk):
+                        truncated = True
+                        break
+                body = bytes(body)
+                self.record_streamed(url, response.raw.tell(), response.headers.get('Content-Length'), truncated)
+            else:
+                body = response.content
+
+            encoding, source = sniff_encoding(body, declared)
+            self.record_encoding(url, encoding, source)
+            page = FetchedPage(
+                url,
+                body,
+                encoding,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                truncated=truncated,
+                encoding_source=source,
+            )
+        if self.cache:
+            self.cache.store(page)
+        return page
+
+    async def fetch_once_async(self, session: aiohttp.ClientSession, url: str,
+                               stream_until: Optional[Callable[[Optional[str]], Optional[RegionEndDetector]]] = None) -> FetchedPage:
+        """
+        Async counterpart of fetch_once.
+        """
+        entry = self.cache.lookup(url, partial=stream_until is not None) if self.cache else None
+        if entry and self.cache.is_fresh(url, entry):
+            return self.cache.load(url, entry)
+
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+        await self.rate_limiter.acquire_async()
+        async with session.get(url, headers=headers) as response:
+            self.record_status(response.status, response.headers.get('Retry-After'))
+            if response.status == 304 and entry:
+                return self.cache.load(url, entry, revalidated=True)
+            response.raise_for_status()
+
+            declared = response.charset
+            detector = stream_until(declared) if stream_until else None
+            truncated = False
+            if detector:
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    body += chunk
+                    if detector.feed_bytes(chunk):
+                        truncated = True
+                        break
+                body = bytes(body)
+                # aiohttp only exposes decompressed bytes, so the wire size
+                # is known only for uncompressed responses
+                received = None if response.headers.get('Content-Encoding') else len(body)
+                self.record_streamed(url, received, response.headers.get('Content-Length'), truncated)
+                if truncated:
+                    # Drop the connection instead of draining the rest of the page
+                    response.close()
+            else:
+                body = await response.read()
+
+            encoding, source = sniff_encoding(body, declared)
+            self.record_encoding(url, encoding, source)
+            page = FetchedPage(
+                url,
+                body,
+                encoding,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                truncated=truncated,
+                encoding_source=source,
+            )
+        if self.cache:
+            self.cache.store(page)
+        return page
+
+    def record_encoding(self, url: str, encoding: str, source: str):
+        """
+        Counts where page encodings came from and remembers the pages that
+        declared no charset and needed fallback detection.
+        """
+        with self._lock:
+            self.encoding_sources[source] = self.encoding_sources.get(source, 0) + 1
+            if source == 'fallback':
+                self.fallback_encoding_urls.append(url)
+        if source == 'fallback':
+            logging.info(f"No charset declared for {url}, detected {encoding}")
+
+    def record_streamed(self, url: str, received: Optional[int], content_length: Optional[str], truncated: bool):
+        """
+        Updates the streaming counters and logs how many bytes of the page
+        were not downloaded. The saving is only known when the server sent
+        Content-Length and the received wire size could be measured.
+        """
+        saved = None
+        if truncated and received is not None and content_length and content_length.isdigit():
+            saved = max(0, int(content_length) - received)
+        with self._lock:
+            self.streamed_pages += 1
+            if truncated:
+                self.truncated_pages += 1
+            if saved:
+                self.bytes_saved += saved
+        if not truncated:
+            logging.debug(f"Streamed {url} to the end, ad body end not found")
+        elif saved is not None:
+            logging.info(f"Stopped {url} after the ad body: {received} of {content_length} bytes, {saved} bytes saved")
+        else:
+            logging.info(f"Stopped {url} after the ad body (full size unknown)")
+
+    def create_async_session(self) -> aiohttp.ClientSession:
+        """
+        Creates an aiohttp session limited to pool_size connections whose
+        connection events feed the same counters as the sync session.
+        Must be called from a running event loop.
+        """
+        async def on_create(session, context, params):
+            self.record_connection(reused=False)
+
+        async def on_reuse(session, context, params):
+            self.record_connection(reused=True)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_create)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+
+        return aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            trace_configs=[trace_config],
+        )
+
+    def log_stats(self):
+        """
+        Logs how many requests reused a pooled connection.
+        """
+        logging.info(f"Connections: {self.new_connections} new, {self.reused_connections} reused")
+        logging.info(f"Retries used: {self.retry_policy.retries} of {self.retry_policy.budget}")
+        if self.encoding_sources:
+            sources = ', '.join(f"{count} {source}" for source, count in sorted(self.encoding_sources.items()))
+            logging.info(f"Page encodings: {sources}")
+        if self.streamed_pages:
+            logging.info(f"Streamed detail pages: {self.truncated_pages} of {self.streamed_pages} stopped "
+                         f"after the ad body, {self.bytes_saved} bytes saved")
+        if self.cache:
+            self.cache.log_stats()
+
+    def close(self):
+        """
+        Closes the persistent session and its pooled connections
+        and persists the HTTP cache index.
+        """
+        self.session.close()
+        if self.cache:
+            self.cache.save()
+
+class SeenJobIndex:
+    """
+    Persistent on-disk index of already scraped jobs keyed by job_id.
+    Each entry keeps a fingerprint of the listing card, the first-seen,
+    last-seen and fetched-at timestamps, the job text and the other detail
+    fields (posting date, salary, ...), so unchanged jobs can be
+    reused on the next run without fetching their detail page.
+    """
+
+    FINGERPRINT_FIELDS = ('title', 'company', 'location')
+
+    def __init__(self, path: str, max_age_days: int = 30, refresh_days: float = 7):
+        """
+        Loads the index from path (a missing or broken file starts empty).
+        Entries not seen for max_age_days are dropped when saving. Stored
+        details are reused for at most refresh_days after their detail page
+        was fetched, so edits of long-running ads are picked up even when
+        their listing card does not change.
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        self.refresh_days = refresh_days
+        self.entries: Dict[str, Dict] = {}
+        self.reused = 0
+        self.expired = 0
+        self.fetched = 0
+        # Fingerprints of the listing cards looked up in this run, by job_id
+        self.card_fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+                logging.info(f"Loaded {len(self.entries)} known jobs from {path}")
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not load job index {path}: {str(e)}")
+
+    def fingerprint(self, job: Dict) -> str:
+        """
+        Returns a stable hash of the listing card fields of a job.
+        """
+        payload = json.dumps([job.get(field) for field in self.FINGERPRINT_FIELDS], ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def lookup(self, job: Dict) -> Optional[Dict]:
+        """
+        Returns the stored detail fields of a known job whose card did not
+        change and whose details are younger than refresh_days, or None
+        when the detail page has to be fetched.
+        Marks the job as seen in this run when it is reused.
+        Must be called with the job as extracted from its listing card: the
+        card fingerprint is kept for record, since the detail page may
+        fill in card fields (such as an empty company) later.
+        """
+        job_id = job.get('job_id')
+        if not job_id:
+            return None
+        cutoff = datetime.now().timestamp() - self.refresh_days * 86400
+        fingerprint = self.fingerprint(job)
+        with self._lock:
+            self.card_fingerprints[job_id] = fingerprint
+            entry = self.entries.get(job_id)
+            if not entry or not entry.get('text') or entry.get('fingerprint') != fingerprint:
+                return None
+            # Entries written before fetched_at was stored count from their first scrape
+            fetched_at = entry.get('fetched_at', entry.get('first_seen'))
+            if not fetched_at or datetime.fromisoformat(fetched_at).timestamp() < cutoff:
+                self.expired += 1
+                return None
+            entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+            self.reused += 1
+            return dict(entry.get('details', {}), text=entry['text'])
+
+    def record(self, job: Dict):
+        """
+        Stores a freshly scraped job, keeping its original first-seen time
+        and setting fetched_at to now. The fingerprint is the one of the
+        listing card seen by lookup, falling back to the job's own fields.
+        Jobs without description text are not stored so they get retried.
+        """
+        job_id = job.get('job_id')
+        if not job_id or not job.get('text'):
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            previous = self.entries.get(job_id, {})
+            self.entries[job_id] = {
+                'fingerprint': self.card_fingerprints.get(job_id) or self.fingerprint(job),
+                'first_seen': previous.get('first_seen', now),
+                'last_seen': now,
+                'fetched_at': now,
+                'text': job['text'],
+                'details': {field: job[field] for field in DETAIL_FIELDS if field != 'text' and job.get(field)},
+            }
+            self.fetched += 1
+
+    def save(self):
+        """
+        Drops stale entries and writes the index atomically to disk.
+        """
+        cutoff = datetime.now().timestamp() - self.max_age_days * 86400
+        with self._lock:
+            self.entries = {
+                job_id: entry for job_id, entry in self.entries.items()
+                if datetime.fromisoformat(entry['last_seen']).timestamp() >= cutoff
+            }
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning(f"Could not save job index {self.path}: {str(e)}")
+                return
+        logging.info(f"Job index: {self.reused} jobs reused, {self.expired} refreshed, {self.fetched} fetched, "
+                     f"{len(self.entries)} stored")
+
+class ParseCache:
+    """
+    Persistent cache of parsed detail fields keyed by a hash of the raw
+    response body (xxh3-128 when xxhash is installed, blake2b otherwise),
+    so byte-identical pages skip parsing entirely.
+    The cache is versioned by the extractor version; a cache written by
+    different extractor code is discarded on load.
+    """
+
+    def __init__(self, path: str, version: str, max_entries: int = 20000):
+        """
+        Loads the cache from path (a missing, broken or outdated file starts
+        empty). Only the max_entries most recently used entries are kept
+        when saving.
+        """
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == version:
+                    self.entries = data.get('entries', {})
+                    logging.info(f"Loaded {len(self.entries)} parsed pages from {path}")
+                else:
+                    logging.info(f"Extractor changed, discarding parse cache {path}")
+            except (OSError, ValueError, AttributeError) as e:
+                logging.warning(f"Could not load parse cache {path}: {str(e)}")
+
+    @staticmethod
+    def key(body: bytes, encoding: Optional[str] = None) -> str:
+        """
+        Returns the content hash of a response body and its encoding.
+        """
+        if xxhash is not None:
+            digest = xxhash.xxh3_128_hexdigest(body)
+        else:
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return f"{digest}:{(encoding or '').lower()}"
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Returns a copy of the fields parsed from a body with this hash,
+        or None when the body has not been parsed before.
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry['last_used'] = time.time()
+            self.hits += 1
+            return dict(entry['fields'])
+
+    def store(self, key: str, fields: Dict):
+        """
+        Stores the fields parsed from a body.
+        """
+        with self._lock:
+            self.entries[key] = {'fields': fields, 'last_used': time.time()}
+
+    def save(self):
+        """
+        Drops the least recently used entries over max_entries and writes
+        the cache atomically to disk.
+        """
+        with self._lock:
+            if len(self.entries) > self.max_entries:
+                newest = sorted(self.entries.items(), key=lambda item: item[1]['last_used'])[-self.max_entries:]
+                self.entries = dict(newest)
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.version, 'entries': self.entries}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning(f"Could not save parse cache {self.path}: {str(e)}")
+                return
+        logging.info(f"Parse cache: {self.hits} hits, {self.misses} misses, {len(self.entries)} stored")
+
+class PipelineStage:
+    """
+    One stage of a Pipeline: a handler run by a number of workers that
+    reads items from a bounded input queue.
+    The handler is called with one item and is either an async generator
+    yielding output items or a coroutine returning an iterable of them
+    (or None). Outputs are passed to the next stage.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], workers: int = 1, queue_size: int = 100):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_time = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+
+    def log_stats(self):
+        """
+        Logs throughput, busy time and input queue depth of the stage.
+        A queue that stays full points at the bottleneck.
+        """
+        average_depth = self.depth_total / self.depth_samples if self.depth_samples else 0.0
+        logging.info(f"Stage {self.name}: {self.workers} workers, {self.items_in} in / {self.items_out} out, "
+                     f"busy {self.busy_time:.1f}s, queue depth avg {average_depth:.1f} "
+                     f"max {self.max_depth} of {self.queue_size}")
+
+class Pipeline:
+    """
+    Staged producer/consumer pipeline.
+    Stages are connected by bounded asyncio queues, which gives
+    backpressure: a slow stage makes the stages before it wait instead of
+    piling up work in memory. Queue depths are sampled while running.
+    """
+
+    _STOP = object()
+
+    def __init__(self, stages: List[PipelineStage], sample_interval: float = 0.5):
+        self.stages = stages
+        self.sample_interval = sample_interval
+
+    async def _worker(self, stage: PipelineStage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        """
+        Runs the stage handler for every item until the stop marker arrives.
+        Errors are logged per item so one bad item cannot stall the pipeline.
+        """
+        while True:
+            item = await inbox.get()
+            if item is self._STOP:
+                return
+            stage.items_in += 1
+            started = time.perf_counter()
+            try:
+                produced = stage.handler(item)
+                if inspect.isasyncgen(produced):
+                    while True:
+                        try:
+                            output = await produced.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        stage.busy_time += time.perf_counter() - started
+                        await self._emit(stage, outbox, output)
+                        started = time.perf_counter()
+                else:
+                    outputs = await produced
+                    stage.busy_time += time.perf_counter() - started
+                    started = time.perf_counter()
+                    for output in outputs or ():
+                        await self._emit(stage, outbox, output)
+                        started = time.perf_counter()
+            except Exception as e:
+                logging.error(f"Error in pipeline stage {stage.name}: {str(e)}")
+            stage.busy_time += time.perf_counter() - started
+
+    async def _emit(self, stage: PipelineStage, outbox: Optional[asyncio.Queue], output: Any):
+        """
+        Passes an output item to the next stage (the last stage drops it).
+        """
+        stage.items_out += 1
+        if outbox is not None:
+            await outbox.put(output)
+
+    async def _run_stage(self, index: int, queues: List[asyncio.Queue]):
+        """
+        Runs all workers of a stage and, once they are done, tells every
+        worker of the next stage to stop.
+        """
+        stage = self.stages[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        await asyncio.gather(*(self._worker(stage, queues[index], outbox) for _ in range(stage.workers)))
+        if outbox is not None:
+            for _ in range(self.stages[index + 1].workers):
+                await outbox.put(self._STOP)
+
+    async def _monitor(self, queues: List[asyncio.Queue]):
+        """
+        Samples the depth of every stage queue until cancelled.
+        """
+        while True:
+            for stage, stage_queue in zip(self.stages, queues):
+                depth = stage_queue.qsize()
+                stage.max_depth = max(stage.max_depth, depth)
+                stage.depth_total += depth
+                stage.depth_samples += 1
+            await asyncio.sleep(self.sample_interval)
+
+    async def run(self, source: Iterable[Any]):
+        """
+        Feeds the source items into the first stage and waits until every
+        stage has drained. Logs per-stage statistics at the end.
+        """
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+
+        async def feed():
+            for item in source:
+                await queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(self._STOP)
+
+        monitor = asyncio.create_task(self._monitor(queues))
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(self._run_stage(i, queues)) for i in range(len(self.stages))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            monitor.cancel()
+            for task in tasks:
+                task.cancel()
+
+        for stage in self.stages:
+            stage.log_stats()
+
+# Job fields written by the tabular sinks, in column order
+SINK_FIELDS = ('job_id', 'title', 'company', 'location', 'url', 'queries',
+               'date_posted', 'valid_through', 'salary', 'employment_type', 'text')
+
+class JobSink(ABC):
+    """
+    Destination of scraped jobs.
+    A sink is opened before the run, receives every finished job through
+    write as soon as the pipeline produces it (in completion order, not in
+    listing order) and is closed at the end of the run.
+    A job is written again when it changes after it was written (tagged
+    by a later query, hydrated with its details): SqliteSink replaces the
+    stored row, the append-only sinks (JSONL, CSV, Parquet) append the
+    updated record, so the last record per job ID is the current one.
+    Sinks that need the detail fields of every job set needs_details; in
+    cards-only runs the jobs are then hydrated before the sinks are closed.
+    """
+
+    name = 'sink'
+    needs_details = False
+
+    def open(self):
+        """
+        Prepares the sink for writing.
+        """
+
+    @abstractmethod
+    def write(self, job: Dict):
+        """
+        Receives one finished job.
+        """
+
+    def close(self, complete: bool = True):
+        """
+        Finishes the output. complete is False when the run failed.
+        Raises an exception when the output could not be finished.
+        """
+
+class BufferedJobSink(JobSink):
+    """
+    Sink that collects jobs in a buffer and writes them in bulk every
+    batch_size jobs and when closed.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.buffer: List[Dict] = []
+        self.written = 0
+
+    def write(self, job: Dict):
+        # Copy the job: the live dict may still change before the buffer is flushed
+        self.buffer.append({**job, 'queries': list(job.get('queries') or [])})
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered jobs.
+        """
+        if not self.buffer:
+            return
+        self.write_batch(self.buffer)
+        self.written += len(self.buffer)
+        self.buffer = []
+
+    @abstractmethod
+    def write_batch(self, jobs: List[Dict]):
+        """
+        Writes a batch of jobs to the output.
+        """
+
+    def close(self, complete: bool = True):
+        self.flush()
+        logging.info(f"Wrote {self.written} jobs to {self.path}")
+
+    @staticmethod
+    def row(job: Dict) -> Dict:
+        """
+        Returns the SINK_FIELDS of a job as flat values (queries joined).
+        """
+        row = {field: job.get(field) for field in SINK_FIELDS}
+        row['queries'] = ', '.join(job.get('queries') or [])
+        return row
+
+class JsonlSink(BufferedJobSink):
+    """
+    Writes one JSON object per job and line. Every batch is flushed to
+    disk, so the file can be tailed while the crawl is running.
+    """
+
+    name = 'jsonl'
+
+    def open(self):
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def write_batch(self, jobs: List[Dict]):
+        self.file.write(''.join(json.dumps(job, ensure_ascii=False) + '\n' for job in jobs))
+        self.file.flush()
+
+    def close(self, complete: bool = True):
+        super().close(complete)
+        self.file.close()
+
+class CsvSink(BufferedJobSink):
+    """
+    Writes the SINK_FIELDS of every job as a CSV row with a header line.
+    """
+
+    name = 'csv'
+
+    def open(self):
+        self.file = open(self.path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=SINK_FIELDS)
+        self.writer.writeheader()
+
+    def write_batch(self, jobs: List[Dict]):
+        self.writer.writerows(self.row(job) for job in jobs)
+        self.file.flush()
+
+    def close(self, complete: bool = True):
+        super().close(complete)
+        self.file.close()
+
+class SqliteSink(BufferedJobSink):
+    """
+    Upserts jobs into the jobs table of a SQLite database, keyed by job ID
+    (or URL for jobs without one), one transaction per batch.
+    The database is in WAL mode, so other processes can read it while the
+    crawl is running, and it accumulates jobs across runs.
+    """
+
+    name = 'sqlite'
+
+    def open(self):
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        columns = ', '.join(f"{field} TEXT" for field in SINK_FIELDS)
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, {columns}, scraped_at TEXT)")
+        self.connection.commit()
+
+    def write_batch(self, jobs: List[Dict]):
+        scraped_at = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        for job in jobs:
+            row = self.row(job)
+            rows.append([job.get('job_id') or job['url']] + [row[field] for field in SINK_FIELDS] + [scraped_at])
+        placeholders = ', '.join('?' * (len(SINK_FIELDS) + 2))
+        with self.connection:
+            self.connection.executemany(f"INSERT OR REPLACE INTO jobs VALUES ({placeholders})", rows)
+
+    def close(self, complete: bool = True):
+        super().close(complete)
+        self.connection.close()
+
+class ParquetSink(BufferedJobSink):
+    """
+    Writes the SINK_FIELDS of every job to a Parquet file, one row group
+    per batch (queries as a list column). Needs the optional pyarrow
+    package; the file is readable once the sink has been closed.
+    """
+
+    name = 'parquet'
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        super().__init__(path, batch_size)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("The parquet sink needs pyarrow") from e
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            (field, pyarrow.list_(pyarrow.string()) if field == 'queries' else pyarrow.string())
+            for field in SINK_FIELDS
+        ])
+
+    def open(self):
+        self.writer = self.pyarrow.parquet.ParquetWriter(self.path, self.schema)
+
+    def write_batch(self, jobs: List[Dict]):
+        columns = {field: [job.get(field) for job in jobs] for field in SINK_FIELDS}
+        columns['queries'] = [list(job.get('queries') or []) for job in jobs]
+        self.writer.write_table(self.pyarrow.table(columns, schema=self.schema))
+
+    def close(self, complete: bool = True):
+        super().close(complete)
+        self.writer.close()
+
+class GoogleDocSink(JobSink):
+    """
+    Publishes the markdown document of all scraped jobs to the Google Doc
+    when the run is closed (see JobScraper.update_google_doc). The
+    document is diffed as a whole, so nothing is sent per job; runs that
+    failed, skipped listing pages or produced no jobs leave the document
+    untouched, since the diff would delete the missing jobs from it.
+    """
+
+    name = 'gdoc'
+    needs_details = True
+
+    def __init__(self, job_scraper: 'JobScraper'):
+        self.job_scraper = job_scraper
+        self.received = 0
+
+    def write(self, job: Dict):
+        self.received += 1
+
+    def close(self, complete: bool = True):
+        if not complete:
+            logging.warning("Run is incomplete, not updating Google Doc")
+            return
+        if not self.received:
+            logging.info("Nothing scraped, not updating Google Doc")
+            return
+        if not self.job_scraper.update_google_doc():
+            raise RuntimeError("Failed to update Google Doc")
+
+# File sinks selectable by name in SCRAPER_SINKS
+SINK_TYPES = {
+    'jsonl': JsonlSink,
+    'csv': CsvSink,
+    'sqlite': SqliteSink,
+    'parquet': ParquetSink,
+}
+
+def create_sink(spec: str) -> JobSink:
+    """
+    Creates a file sink from a 'type:path' spec, e.g. 'jsonl:jobs.jsonl'.
+    """
+    kind, _, path = spec.strip().partition(':')
+    if kind not in SINK_TYPES or not path:
+        raise ValueError(f"Unknown sink: {spec} (expected one of {', '.join(SINK_TYPES)} as type:path)")
+    return SINK_TYPES[kind](path)
 
 class JobScraper:
     """
     Main scraper class that coordinates the entire scraping process.
     Handles job scraping, data processing, and output to Google Docs.
     """
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+    }
     
-    def __init__(self):
+    def __init__(self, queries: Optional[List[str]] = None, parser: Optional[str] = None,
+                 engine: str = 'beautifulsoup', max_concurrency: int = 8, queue_size: int = 100, pool_size: int = 10,
+                 index_path: Optional[str] = None, index_refresh_days: float = 7, cache_dir: Optional[str] = None,
+                 requests_per_second: float = 4.0, burst: int = 4,
+                 max_attempts: int = 4, retry_budget: int = 50,
+                 listing_workers: Optional[int] = None, parse_workers: Optional[int] = None,
+                 parse_mode: str = 'auto', process_pool_threshold: int = 50, stream_details: bool = False,
+                 cards_only: bool = False, parse_cache_path: Optional[str] = None,
+                 doc_chunk_size: int = 200000, sinks: Optional[List[JobSink]] = None):
         """
-        Initialize scraper with JobsCzScraper instance and empty jobs list.
-        Sets up Google Docs API connection.
+        Initialize scraper with a jobs.cz scraper for the given search
+        queries, parser backend and extraction engine (both checked against
+        reference fixtures, see create_board_scraper) and empty jobs list.
+        max_concurrency limits how many detail pages are fetched at once,
+        queue_size bounds the number of listing cards waiting for a worker
+        and pool_size sets the number of keep-alive connections per host.
+        When index_path is set, known jobs are reused from a SeenJobIndex
+        instead of fetching their detail pages again (for at most
+        index_refresh_days after they were fetched), and cache_dir enables
+        the on-disk HttpCache with conditional revalidation.
+        All requests share one RateLimiter with requests_per_second and burst
+        and one RetryPolicy allowing max_attempts tries per request and
+        retry_budget retries per run; Google Docs publishing gets its own
+        RetryPolicy with the same limits, so a crawl that used up its
+        budget still retries failed chunks.
+        listing_workers and parse_workers set the worker counts of the
+        listing fetch and detail parse pipeline stages (by default every
+        query gets its own listing worker, parsing gets one worker per CPU).
+        parse_mode selects where detail pages are parsed ('inline',
+        'process' or 'auto', see detail_executor).
+        With stream_details, detail pages are streamed and the download
+        stops as soon as the ad body has been received.
+        In cards_only mode the sweep fetches listing pages only; jobs keep
+        their card fields (plus anything known from the seen-job index) and
+        their detail pages are fetched later by hydrate_jobs for the jobs
+        that actually need them, at the latest by close_sinks when a sink
+        needs the details.
+        When parse_cache_path is set, fields parsed from detail pages are
+        kept in a ParseCache so byte-identical pages are not parsed again.
+        doc_chunk_size bounds the characters inserted by one Google Docs
+        batchUpdate call (see chunk_requests).
+        Every finished job is written to the given sinks as soon as the
+        pipeline produces it (see emit).
+        The Google Docs API connection is set up lazily on first use (see
+        docs_service), so scraping alone never touches the Google stack.
         """
-        self.scraper = JobsCzScraper()
+        self.scraper = self.create_board_scraper(engine, queries, parser)
         self.jobs: List[Dict] = []
-        self.setup_google_docs()
+        self.max_concurrency = max(1, max_concurrency)
+        self.listing_workers = max(1, listing_workers or len(self.scraper.queries))
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        if parse_mode not in ('inline', 'process', 'auto'):
+            raise ValueError(f"Unknown parse mode: {parse_mode}")
+        self.parse_mode = parse_mode
+        self.process_pool_threshold = process_pool_threshold
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.stream_details = stream_details
+        self.cards_only = cards_only
+        self.hydrating = 0
+        self.queue_size = max(1, queue_size)
+        cache = HttpCache(cache_dir) if cache_dir else None
+        rate_limiter = RateLimiter(requests_per_second, burst)
+        retry_policy = RetryPolicy(max_attempts=max_attempts, budget=retry_budget)
+        self.transport = HttpTransport(self.HEADERS, pool_size=pool_size, cache=cache,
+                                       rate_limiter=rate_limiter, retry_policy=retry_policy)
+        self.total_counts: Dict[str, int] = {}
+        self.pages_scraped: Dict[str, int] = {}
+        self.skipped_pages: List[Tuple[str, int]] = []
+        self.seen_index = SeenJobIndex(index_path, refresh_days=index_refresh_days) if index_path else None
+        self.parse_cache = ParseCache(parse_cache_path, self.scraper.extractor_version()) if parse_cache_path else None
+        self.doc_chunk_size = max(1, doc_chunk_size)
+        self.docs_retry_policy = RetryPolicy(max_attempts=max_attempts, budget=retry_budget)
+        self._docs_service = None
+        self.sinks: List[JobSink] = list(sinks or [])
+        self.sinks_open = False
+        self.sinks_closed = False
+        self.failed_jobs: List[Dict] = []
+        self.failed_cards = 0
+        self.duplicate_cards = 0
+
+    def create_board_scraper(self, engine: str, queries: Optional[List[str]], parser: Optional[str]) -> JobsCzScraper:
+        """
+        Creates the jobs.cz scraper for the selected extraction engine.
+        The BeautifulSoup implementation is the reference: an alternative
+        engine is only used when it is installed and gives the same output
+        on the reference fixtures.
+        """
+        if engine not in EXTRACTION_ENGINES:
+            raise ValueError(f"Unknown extraction engine: {engine}")
+
+        reference = JobsCzScraper(queries, parser)
+        reference.verify_parser()
+        if EXTRACTION_ENGINES[engine] is JobsCzScraper:
+            return reference
+
+        try:
+            candidate = EXTRACTION_ENGINES[engine](queries, parser)
+        except ImportError as e:
+            logging.warning(f"Extraction engine {engine} is not available ({str(e)}), using beautifulsoup")
+            return reference
+        if not candidate.verify_engine(reference):
+            logging.warning(f"Extraction engine {engine} differs from beautifulsoup, using beautifulsoup")
+            return reference
+
+        logging.info(f"Using extraction engine {engine}")
+        return candidate
+
+    @property
+    def docs_service(self):
+        """
+        Google Docs API client, built by setup_google_docs on first use.
+        """
+        if self._docs_service is None:
+            self.setup_google_docs()
+        return self._docs_service
+
+    @docs_service.setter
+    def docs_service(self, service):
+        self._docs_service = service
 
     def setup_google_docs(self):
         """
         Sets up Google Docs API client using service account credentials.
         Credentials are loaded from environment variables.
+        The Google client libraries are imported here rather than at module
+        level, and the client is built from the discovery document bundled
+        with google-api-python-client instead of fetching it at runtime.
+        Raises ValueError when GOOGLE_SERVICE_ACCOUNT is not set.
         """
-        credentials_dict = json.loads(os.getenv('GOOGLE_SERVICE_ACCOUNT'))
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
+        service_account_json = os.getenv('GOOGLE_SERVICE_ACCOUNT')
+        if not service_account_json:
+            raise ValueError("GOOGLE_SERVICE_ACCOUNT not found in environment variables")
+        credentials_dict = json.loads(service_account_json)
         credentials = service_account.Credentials.from_service_account_info(
             credentials_dict,
             scopes=['https://www.googleapis.com/auth/documents']
         )
-        self.docs_service = build('docs', 'v1', credentials=credentials)
+        self.docs_service = build('docs', 'v1', credentials=credentials, static_discovery=True, cache_discovery=False)
 
-    def fetch_page(self, url: str) -> BeautifulSoup:
+    def detail_stream_until(self) -> Optional[Callable[[Optional[str]], Optional[RegionEndDetector]]]:
         """
-        Fetches a webpage and returns BeautifulSoup object.
-        Uses custom headers to mimic browser request.
-        Implements error handling and logging.
+        Returns the end detector factory passed to the transport for detail
+        pages, or None when detail pages are downloaded in full.
         """
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            logging.info(f"Fetching URL: {url}")
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            return BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            logging.error(f"Error fetching {url}: {str(e)}")
-            return None
+        return self.scraper.detail_end_detector if self.stream_details else None
 
-    def extract_job_details(self, job_item: BeautifulSoup) -> Optional[Dict]:
+    def parse_detail_fields(self, page: FetchedPage) -> Dict:
         """
-        Extracts all relevant job details from a job listing:
-        - Title
-        - Company
-        - Location
-        - URL
-        - Job ID
-        - Full job description
-        Returns dictionary with job details or None if extraction fails.
+        Parses a fetched detail page in this process, serving the fields
+        from the parse cache when the same body was parsed before.
+        """
+        key = self.parse_cache.key(page.body, page.encoding) if self.parse_cache else None
+        fields = self.parse_cache.lookup(key) if key else None
+        if fields is None:
+            fields = self.scraper.parse_detail(page.body, page.encoding)
+            if key:
+                self.parse_cache.store(key, fields)
+        return fields
+
+    def apply_detail(self, job: Dict, fields: Dict):
+        """
+        Merges the fields parsed from a detail page into a job and records
+        the job in the seen-job index. Detail fields overwrite, card fields
+        (title, company, ...) are only filled in when the card did not have
+        them.
+        Logs a warning when the description cannot be found.
+        """
+        for key, value in fields.items():
+            if key in DETAIL_FIELDS or not job.get(key):
+                job[key] = value
+        if not job.get('text'):
+            logging.warning(f"Could not find job description for {job['title']} at {job['company']}")
+        if self.seen_index:
+            self.seen_index.record(job)
+
+    def reuse_known_job(self, job: Dict) -> bool:
+        """
+        Fills the detail fields from the seen-job index when the job is
+        already known and its listing card is unchanged.
+        Returns True if the detail page does not need to be fetched.
+        """
+        if not self.seen_index:
+            return False
+        fields = self.seen_index.lookup(job)
+        if fields is None:
+            return False
+        job.update(fields)
+        return True
+
+    def handle_detail_error(self, job: Dict, error: FetchError):
+        """
+        Logs a failed detail fetch. Jobs that failed with a retryable error
+        are queued for the final retry sweep in scrape_jobs.
+        """
+        logging.error(f"Error fetching {job['url']}: {str(error)}")
+        if error.retryable:
+            self.failed_jobs.append(job)
+
+    def retry_failed_jobs(self):
+        """
+        Final retry sweep: fetches the detail pages that failed with a
+        retryable error once more and fills in their text in place.
+        The swept jobs are written to the sinks here, once their outcome
+        is final.
+        Returns number of jobs that are still missing their description.
         """
+        if not self.failed_jobs:
+            return 0
+
+        logging.info(f"Retrying {len(self.failed_jobs)} failed detail pages")
+        still_failed = []
+        for job in self.failed_jobs:
+            try:
+                page = self.transport.fetch(job['url'], self.detail_stream_until())
+                self.apply_detail(job, self.parse_detail_fields(page))
+            except Exception as e:
+                logging.error(f"Giving up on {job['url']}: {str(e)}")
+                still_failed.append(job)
+            self.emit(job)
+        self.failed_jobs = still_failed
+        return len(still_failed)
+
+    def probe_listing_page(self, page: int, query: Optional[str] = None) -> Optional[Tuple[Optional[int], List[Optional[Dict]]]]:
+        """
+        Fetches a listing page of query and returns its total job count and
+        cards if the page still contains job cards, or None once the board
+        scraper reports the end (or the page cannot be fetched).
+        """
+        url = self.scraper.listing_url(page, query)
         try:
-            # Find job title
-            title_elem = job_item.find('h2', class_='SearchResultCard__title')
-            if not title_elem:
-                logging.warning("No title element found in job listing")
-                return None
-            title = title_elem.get_text(strip=True)
-            
-            # Find job URL
-            url_elem = title_elem.find('a', class_='link-primary')
-            if not url_elem or 'href' not in url_elem.attrs:
-                logging.warning("No URL element found in job listing")
-                return None
-            url = url_elem['href']
-            if not url.startswith('http'):
-                url = f"https://www.jobs.cz{url}"
-                
-            # Extract job ID from URL
-            job_id = None
-            id_match = re.search(r'/rpd/(\d+)/', url)
-            if id_match:
-                job_id = id_match.group(1)
-            else:
-                logging.warning(f"Could not extract job ID from URL: {url}")
-            
-            # Find company name
-            company_elem = job_item.find('span', {'translate': 'no'})
-            company = company_elem.get_text(strip=True) if company_elem else ""
-            
-            # Find location
-            location_elem = job_item.find('li', {'data-test': 'serp-locality'})
-            location = location_elem.get_text(strip=True) if location_elem else "Remote"
-            
-            # Get full job text from the detail page
-            job_soup = self.fetch_page(url)
-            job_text = ""
-            if job_soup:
-                job_text = self.scraper.extract_job_text(job_soup)
-                if not job_text:
-                    logging.warning(f"Could not find job description for {title} at {company}")
-            
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'url': url,
-                'job_id': job_id,
-                'text': job_text
-            }
-            
-        except Exception as e:
-            logging.warning(f"Error extracting job details: {str(e)}")
+            logging.info(f"Fetching URL: {url}")
+            listing = self.transport.fetch(url)
+        except FetchError as e:
+            logging.warning(f"Failed to fetch page {page}: {str(e)}")
+            return None
+
+        end_reason, total_count, cards = self.parse_listing(listing)
+        if end_reason:
+            logging.info(f"Page {page}: {end_reason}")
             return None
 
-    def get_total_pages(self) -> int:
+        logging.info(f"Found {len(cards)} jobs on page {page}")
+        return total_count, cards
+
+    def get_total_pages(self, query: Optional[str] = None) -> int:
         """
         Determines total number of pages with job listings.
-        Handles pagination and checks for last page indicators:
-        - "Page not available" message
-        - Empty results
-        - No results message
-        Returns total number of pages found.
+        Uses a galloping probe (pages 1, 2, 4, 8, ...) until a page past the
+        end is found, then binary searches between the last existing page
+        and that one, so only O(log N) listing pages are downloaded.
+        The result is cross-checked against the job count from
+        SearchHeader__title divided by the page size of the first page.
+        Only needed when the page count must be known up front,
+        scrape_jobs detects the end while streaming instead.
+        Returns total number of pages found for query (default: first query).
         """
-        page = 1
+        first_page = self.probe_listing_page(1, query)
+        if not first_page:
+            logging.info("Total pages found: 0")
+            return 0
+
+        # Gallop: last_found always exists, first_missing never does
+        last_found, first_missing = 1, 2
         while True:
-            url = f"{self.scraper.base_url}?q[]={self.scraper.search_params['q[]']}&page={page}"
-            soup = self.fetch_page(url)
-            
-            # Check if page exists
-            if not soup:
-                logging.warning(f"Failed to fetch page {page}")
+            if not self.probe_listing_page(first_missing, query):
                 break
-            
-            # Check for "page not available" message
-            not_available = soup.find(string=lambda text: 'Zadaná stránka už není dostupná' in str(text) if text else False)
-            if not_available:
-                logging.info(f"Page {page} not available - reached end of listings")
-                page -= 1  # Go back one page since this one isn't valid
-                break
-            
-            # Check for job listings
-            job_items = soup.find_all('article', class_='SearchResultCard')
-            if not job_items:
-                # Double check if we're on a "no results" page
-                no_results = soup.find('div', class_='SearchNoResults')
-                if no_results:
-                    logging.info("No results found")
-                    break
-                # Also check for empty results container
-                results_container = soup.find('div', class_='SearchResultList')
-                if results_container and len(results_container.find_all('article')) == 0:
-                    logging.info("Empty results container found")
-                    break
-                
-            logging.info(f"Found {len(job_items)} jobs on page {page}")
-            page += 1
-            
-            # Add a small delay between requests
-            time.sleep(1)
-        
-        total_pages = page
+            last_found, first_missing = first_missing, first_missing * 2
+
+        # Binary search for the last existing page
+        while first_missing - last_found > 1:
+            middle = (last_found + first_missing) // 2
+            if self.probe_listing_page(middle, query):
+                last_found = middle
+            else:
+                first_missing = middle
+
+        total_pages = last_found
         logging.info(f"Total pages found: {total_pages}")
+
+        # Cross-check with the advertised number of jobs
+        total_count, first_cards = first_page
+        page_size = len(first_cards)
+        if total_count is not None and page_size:
+            estimated_pages = -(-total_count // page_size)
+            if estimated_pages != total_pages:
+                logging.warning(f"Probed {total_pages} pages but {total_count} jobs at {page_size} per page suggest {estimated_pages}")
+
         return total_pages
 
-    def scrape_jobs(self):
+    def parse_listing(self, page: FetchedPage) -> Tuple[Optional[str], Optional[int], List[Optional[Dict]]]:
         """
-        Main scraping function that:
-        1. Gets total number of pages
-        2. Iterates through each page
-        3. Extracts job listings from each page
-        4. Processes each job listing
-        Implements error handling and logging throughout.
-        Returns True if any jobs were successfully scraped.
+        Parses a fetched listing page with the board scraper, see
+        JobBoardScraper.parse_listing.
         """
-        try:
-            page = 1
-            total_jobs_found = 0
-            failed_jobs = 0
-            
-            # Get total number of pages first
-            total_pages = self.get_total_pages()
-            logging.info(f"Found {total_pages} pages to scrape")
-            
-            # Find total number of jobs from first page
-            initial_url = f"{self.scraper.base_url}?q[]={self.scraper.search_params['q[]']}"
-            initial_soup = self.fetch_page(initial_url)
-            if not initial_soup:
-                logging.error("Failed to fetch initial page")
-                return False
-            
-            # Find total number of jobs
-            total_count_elem = initial_soup.find('h1', class_='SearchHeader__title')
-            if total_count_elem:
+        return self.scraper.parse_listing(page.body, page.encoding)
+
+    def detail_executor(self, thread_executor: ThreadPoolExecutor) -> Executor:
+        """
+        Returns the executor for detail-page parsing according to parse_mode:
+        - 'inline' parses in this process on thread_executor
+        - 'process' parses in a pool of parse_workers processes
+        - 'auto' uses the process pool only when the listings announce (or
+          hydrate_jobs asks for) at least process_pool_threshold jobs, since starting worker
+          processes does not pay off for small runs
+        Once started, the process pool is used for the rest of the run.
+        """
+        if self.parse_mode == 'inline':
+            return thread_executor
+        if self.process_pool is not None:
+            return self.process_pool
+        expected = self.hydrating or sum(self.total_counts.values())
+        if self.parse_mode == 'auto' and expected < self.process_pool_threshold:
+            return thread_executor
+
+        logging.info(f"Parsing detail pages in {self.parse_workers} worker processes")
+        self.process_pool = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        return self.process_pool
+
+    def build_pipeline(self, session: aiohttp.ClientSession, executor: ThreadPoolExecutor,
+                       results: Dict[int, Dict], hydrate: bool = False) -> Pipeline:
+        """
+        Builds the scraping pipeline:
+        1. listing fetch - walks the listing pages of each query (I/O)
+        2. card extraction - parses listing pages, dedupes cards by job_id
+        3. detail fetch - downloads detail pages of new jobs (I/O)
+        4. detail parse - extracts job descriptions (CPU, on the executor)
+        5. sink - collects finished jobs under their listing index and
+           writes them to the output sinks
+        In cards_only mode stages 3 and 4 are left out. With hydrate the
+        pipeline consists of stages 3 to 5 only and is fed (index, job)
+        pairs of already extracted jobs.
+        """
+        loop = asyncio.get_running_loop()
+        ended_queries = set()
+        seen: Dict[str, Dict] = {}
+        emitted = set()
+
+        async def fetch_listing(query: str):
+            page_number = 1
+            failures = 0
+            while query not in ended_queries:
+                url = self.scraper.listing_url(page_number, query)
+                logging.info(f"Scraping page {page_number} of '{query}'...")
                 try:
-                    count = int(''.join(filter(str.isdigit, total_count_elem.text)))
-                    logging.info(f"Total jobs found: {count}")
-                except ValueError:
-                    logging.warning("Could not parse total job count")
-            
-            # Scrape each page
-            while page <= total_pages:
-                url = f"{self.scraper.base_url}?q[]={self.scraper.search_params['q[]']}"
-                if page > 1:
-                    url += f"&page={page}"
-                
-                logging.info(f"Scraping page {page} of {total_pages}...")
-                soup = self.fetch_page(url)
-                if not soup:
-                    logging.error(f"Failed to fetch page {page}")
-                    page += 1
+                    page = await self.transport.fetch_async(session, url)
+                except FetchError as e:
+                    if not e.retryable and page_number > 1:
+                        # Pages past the last one may answer 404 instead of an end-of-listing page
+                        logging.info(f"Page {page_number} of '{query}': {str(e)} - reached end of listings")
+                        return
+                    self.skipped_pages.append((query, page_number))
+                    if not e.retryable:
+                        logging.error(f"Failed to fetch page {page_number} of '{query}', stopping pagination: {str(e)}")
+                        return
+                    failures += 1
+                    if failures >= MAX_LISTING_FAILURES:
+                        logging.error(f"Failed to fetch page {page_number} of '{query}', stopping pagination "
+                                      f"after {failures} failed pages in a row: {str(e)}")
+                        return
+                    logging.error(f"Failed to fetch page {page_number} of '{query}', skipping it: {str(e)}")
+                    page_number += 1
                     continue
-                
-                # Find all job listings on the page
-                job_items = soup.find_all('article', class_='SearchResultCard')
-                if not job_items:
-                    logging.warning(f"No job items found on page {page}")
-                    page += 1
+                failures = 0
+                end_reason = self.scraper.listing_end_reason_raw(page.body, page.encoding)
+                if end_reason and page_number > 1:
+                    logging.info(f"Page {page_number} of '{query}': {end_reason} - reached end of listings")
+                    return
+                yield query, page_number, page
+                page_number += 1
+
+        async def extract_cards(item):
+            query, page_number, page = item
+            end_reason, total_count, cards = await loop.run_in_executor(executor, self.parse_listing, page)
+            if page_number == 1 and total_count is not None:
+                self.total_counts[query] = total_count
+                logging.info(f"Total jobs found for '{query}': {total_count}")
+            if end_reason:
+                ended_queries.add(query)
+                logging.info(f"Page {page_number} of '{query}': {end_reason} - reached end of listings")
+                return
+            logging.info(f"Found {len(cards)} job items on page {page_number} of '{query}'")
+            self.pages_scraped[query] = max(page_number, self.pages_scraped.get(query, 0))
+            for card in cards:
+                if not card:
+                    self.failed_cards += 1
                     continue
-                
-                logging.info(f"Found {len(job_items)} job items on page {page}")
-                
-                for job_item in job_items:
+                key = card['job_id'] or card['url']
+                if key in seen:
+                    if query not in seen[key]['queries']:
+                        seen[key]['queries'].append(query)
+                        if key in emitted:
+                            # Already written to the sinks, write it again with all its queries
+                            self.emit(seen[key])
+                    self.duplicate_cards += 1
+                    continue
+                card['queries'] = [query]
+                seen[key] = card
+                if self.cards_only:
+                    self.reuse_known_job(card)
+                yield len(seen) - 1, card
+
+        async def fetch_detail(item):
+            index, job = item
+            if self.reuse_known_job(job):
+                yield index, job, None
+                return
+            try:
+                logging.info(f"Fetching URL: {job['url']}")
+                page = await self.transport.fetch_async(session, job['url'], self.detail_stream_until())
+            except FetchError as e:
+                self.handle_detail_error(job, e)
+                page = None
+            yield index, job, page
+
+        async def parse_detail(item):
+            index, job, page = item
+            if page is not None:
+                key = self.parse_cache.key(page.body, page.encoding) if self.parse_cache else None
+                fields = self.parse_cache.lookup(key) if key else None
+                if fields is None:
                     try:
-                        job_details = self.extract_job_details(job_item)
-                        if job_details:
-                            self.jobs.append(job_details)
-                            total_jobs_found += 1
-                            logging.info(f"Scraped job {total_jobs_found}: {job_details['title']} at {job_details['company']}")
-                        else:
-                            failed_jobs += 1
+                        try:
+                            fields = await loop.run_in_executor(self.detail_executor(executor), parse_detail_page,
+                                                                self.scraper, page.body, page.encoding)
+                        except BrokenExecutor:
+                            logging.error("Parsing process pool broke, falling back to in-process parsing")
+                            self.parse_mode = 'inline'
+                            fields = await loop.run_in_executor(executor, parse_detail_page,
+                                                                self.scraper, page.body, page.encoding)
                     except Exception as e:
-                        logging.warning(f"Error scraping job on page {page}: {str(e)}")
-                        failed_jobs += 1
-                        continue
-                
-                # Add delay between pages to be nice to the server
-                if page < total_pages:
-                    time.sleep(2)
-                page += 1
+                        logging.warning(f"Error extracting job details: {str(e)}")
+                        self.failed_cards += 1
+                        return
+                    if key:
+                        self.parse_cache.store(key, fields)
+                self.apply_detail(job, fields)
+            yield index, job
+
+        async def sink(item):
+            index, job = item
+            results[index] = job
+            logging.info(f"Scraped job {len(results)}: {job['title']} at {job['company']}")
+            # Jobs queued for the retry sweep are emitted by retry_failed_jobs
+            if not any(failed is job for failed in self.failed_jobs):
+                self.emit(job)
+                emitted.add(job['job_id'] or job['url'])
+
+        listing_stages = [
+            PipelineStage('listing_fetch', fetch_listing, self.listing_workers, self.queue_size),
+            PipelineStage('card_extraction', extract_cards, 1, self.queue_size),
+        ]
+        detail_stages = [
+            PipelineStage('detail_fetch', fetch_detail, self.max_concurrency, self.queue_size),
+            PipelineStage('detail_parse', parse_detail, self.parse_workers, self.queue_size),
+        ]
+        sink_stage = PipelineStage('sink', sink, 1, self.queue_size)
+        if hydrate:
+            return Pipeline(detail_stages + [sink_stage])
+        if self.cards_only:
+            return Pipeline(listing_stages + [sink_stage])
+        return Pipeline(listing_stages + detail_stages + [sink_stage])
+
+    async def run_pipeline(self, jobs: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Runs the scraping pipeline over all configured queries, or only its
+        detail stages over the given jobs (see hydrate_jobs).
+        Returns the scraped jobs in listing order.
+        """
+        results: Dict[int, Dict] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.parse_workers) as executor:
+                async with self.transport.create_async_session() as session:
+                    if jobs is None:
+                        pipeline = self.build_pipeline(session, executor, results)
+                        await pipeline.run(self.scraper.queries)
+                    else:
+                        pipeline = self.build_pipeline(session, executor, results, hydrate=True)
+                        await pipeline.run(enumerate(jobs))
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.shutdown()
+                self.process_pool = None
+        return [results[index] for index in sorted(results)]
+
+    def scrape_jobs(self):
+        """
+        Main scraping function that:
+        1. Streams listing pages of every query until the end is detected
+        2. Extracts and deduplicates job cards as soon as a page arrives
+        3. Fetches and parses detail pages in a staged pipeline, keeping listing order
+        Listing pages that still fail with a retryable error after retries
+        are skipped and listed in skipped_pages (pagination of a query
+        stops after MAX_LISTING_FAILURES failed pages in a row); the jobs of
+        such a run are incomplete and main does not publish them to the
+        Google Doc. A non-retryable error (such as a 404) past the first
+        page ends the listing of the query.
+        Implements error handling and logging throughout.
+        Returns True if any jobs were successfully scraped.
+        """
+        try:
+            self.total_counts = {}
+            self.pages_scraped = {}
+            self.skipped_pages = []
+            self.failed_cards = 0
+            self.duplicate_cards = 0
+            self.open_sinks()
 
-            logging.info(f"Successfully scraped {total_jobs_found} Python jobs across {page-1} pages")
+            self.jobs.extend(asyncio.run(self.run_pipeline()))
+            total_jobs_found = len(self.jobs)
+            failed_jobs = self.failed_cards
+            if self.duplicate_cards:
+                logging.info(f"Skipped {self.duplicate_cards} duplicate cards matched by several queries")
+
+            missing_text = self.retry_failed_jobs()
+            if missing_text:
+                logging.warning(f"{missing_text} jobs are missing their description after the retry sweep")
+
+            logging.info(f"Successfully scraped {total_jobs_found} jobs across {sum(self.pages_scraped.values())} pages")
+            if self.skipped_pages:
+                skipped = ', '.join(f"{page} of '{query}'" for query, page in self.skipped_pages)
+                logging.warning(f"Skipped {len(self.skipped_pages)} listing pages that could not be fetched: {skipped}")
             if failed_jobs > 0:
                 logging.warning(f"Failed to scrape {failed_jobs} jobs")
+            self.transport.log_stats()
+            if self.transport.cache:
+                self.transport.cache.save()
+            if self.seen_index:
+                self.seen_index.save()
+            if self.parse_cache:
+                self.parse_cache.save()
             return total_jobs_found > 0
 
         except Exception as e:
             logging.error(f"Fatal error in scrape_jobs: {str(e)}")
             return False
 
+    def hydrate_jobs(self, jobs: Iterable[Dict]) -> int:
+        """
+        Lazily fills in the detail fields of jobs from a cards-only run.
+        Only jobs without text are fetched; they go through the detail
+        stages of the pipeline and the final retry sweep and are updated in
+        place and written to the sinks again with their details.
+        Returns number of jobs that were hydrated.
+        """
+        pending = [job for job in jobs if not job.get('text')]
+        if not pending:
+            return 0
+
+        logging.info(f"Hydrating {len(pending)} jobs from their detail pages")
+        self.open_sinks()
+        self.hydrating = len(pending)
+        try:
+            asyncio.run(self.run_pipeline(pending))
+        finally:
+            self.hydrating = 0
+        self.retry_failed_jobs()
+        if self.seen_index:
+            self.seen_index.save()
+        if self.parse_cache:
+            self.parse_cache.save()
+        if self.transport.cache:
+            self.transport.cache.save()
+        return sum(1 for job in pending if job.get('text'))
+
+    def open_sinks(self):
+        """
+        Opens the output sinks once before the first job is written.
+        Sinks are never reopened after close_sinks, which would truncate
+        their output; later jobs are then not written to them.
+        """
+        if self.sinks_open:
+            return
+        if self.sinks_closed:
+            logging.warning("Output sinks are already closed, not writing further jobs to them")
+            return
+        for sink in self.sinks:
+            sink.open()
+        self.sinks_open = True
+
+    def emit(self, job: Dict):
+        """
+        Writes a finished job to every sink. A failing sink is logged and
+        does not stop the crawl or the other sinks.
+        """
+        if not self.sinks_open:
+            return
+        for sink in self.sinks:
+            try:
+                sink.write(job)
+            except Exception as e:
+                logging.error(f"Error writing job to {sink.name} sink: {str(e)}")
+
+    def close_sinks(self, complete: bool = True) -> bool:
+        """
+        Closes every sink (complete is False when the run failed).
+        In cards_only mode, the jobs are hydrated first when a sink needs
+        their detail fields (such as the Google Doc), so the hydrated jobs
+        still reach every sink before it is closed.
+        Returns True if all sinks finished their output.
+        """
+        if not self.sinks_open:
+            return True
+        if complete and self.cards_only and any(sink.needs_details for sink in self.sinks):
+            self.hydrate_jobs(self.jobs)
+        success = True
+        for sink in self.sinks:
+            try:
+                sink.close(complete)
+            except Exception as e:
+                logging.error(f"Error closing {sink.name} sink: {str(e)}")
+                success = False
+        self.sinks_open = False
+        self.sinks_closed = True
+        return success
+
     def create_markdown_content(self) -> str:
         """
         Creates formatted markdown content from scraped jobs.
@@ -342,27 +3052,349 @@ class JobScraper:
         - Current timestamp
         - Total number of jobs
         - Formatted details for each job
-        Returns formatted markdown string.
+        Returns formatted markdown string, joined once from
+        iter_markdown_chunks; sinks that do not need the whole string
+        should use iter_markdown_chunks, markdown_lines or write_markdown
+        instead.
         """
-        current_time = datetime.now().strftime("%d.%m.%Y %H:%M")
-        content = f"# Python pracovní nabídky\nPoslední aktualizace: {current_time}\nPočet nalezených nabídek: {len(self.jobs)}\n\n"
+        return ''.join(self.iter_markdown_chunks())
 
+    def markdown_lines(self) -> List[str]:
+        """
+        Returns the markdown document as lines that keep their trailing
+        newline (see split_lines), split chunk by chunk as
+        iter_markdown_chunks produces them, so the whole document is never
+        held as one string next to its lines.
+        """
+        lines: List[str] = []
+        for chunk in self.iter_markdown_chunks():
+            if lines and not lines[-1].endswith('\n'):
+                chunk = lines.pop() + chunk
+            lines.extend(split_lines(chunk))
+        return lines
+
+    def iter_markdown_chunks(self) -> Iterator[str]:
+        """
+        Streams the markdown document: yields the header and then one
+        chunk per job section, so sinks can consume it without the whole
+        document being built in memory. Every chunk ends with a newline.
+        """
+        current_time = datetime.now().strftime("%d.%m.%Y %H:%M")
+        yield f"# {self.document_title()}\nPoslední aktualizace: {current_time}\nPočet nalezených nabídek: {len(self.jobs)}\n\n"
         for job in self.jobs:
-            content += f"## {job['title']}\n"
-            content += f"URL adresa: {job['url']}\n"
-            content += f"ID: {job['job_id']}\n"
-            content += f"Společnost: {job['company']}\n"
-            content += f"Lokalita: {job['location']}\n"
-            content += f"Text inzerátu:\n{job['text']}\n\n---\n\n"
+            yield self.render_job_markdown(job)
+
+    def document_title(self) -> str:
+        """
+        Builds the document heading from the search queries, e.g.
+        "Python, Django pracovní nabídky".
+        """
+        queries = ', '.join(query[:1].upper() + query[1:] for query in self.scraper.queries)
+        return f"{queries} pracovní nabídky"
+
+    def render_job_markdown(self, job: Dict) -> str:
+        """
+        Renders the markdown section of one job. The lines are collected
+        in a list and joined once.
+        """
+        lines = [
+            f"## {job['title']}",
+            f"URL adresa: {job['url']}",
+            f"ID: {job['job_id']}",
+        ]
+        if job.get('queries'):
+            lines.append(f"Hledané výrazy: {', '.join(job['queries'])}")
+        lines.append(f"Společnost: {job['company']}")
+        lines.append(f"Lokalita: {job['location']}")
+        if job.get('salary'):
+            lines.append(f"Mzda: {job['salary']}")
+        if job.get('date_posted'):
+            lines.append(f"Datum zveřejnění: {job['date_posted']}")
+        if job.get('text'):
+            lines.append(f"Text inzerátu:\n{job['text']}")
+        lines.append("\n---\n\n")
+        return '\n'.join(lines)
+
+    def write_markdown(self, stream: TextIO, buffer_size: int = 65536) -> int:
+        """
+        Writes the markdown document to a text stream (file, stdout, ...)
+        chunk by chunk, batching small sections into writes of about
+        buffer_size characters. Returns number of characters written.
+        """
+        written = 0
+        pending: List[str] = []
+        pending_size = 0
+        for chunk in self.iter_markdown_chunks():
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= buffer_size:
+                written += stream.write(''.join(pending))
+                pending, pending_size = [], 0
+        if pending:
+            written += stream.write(''.join(pending))
+        return written
+
+    def read_document_text(self, document: Dict) -> Optional[Tuple[int, str]]:
+        """
+        Returns the start index and the text of a document body as returned
+        by documents().get, without the final newline that every Docs body
+        ends with and that cannot be deleted.
+        Returns None when the body holds anything but contiguous text runs
+        (tables, images, ...), since then text offsets do not map to
+        document indexes.
+        """
+        pieces = []
+        start_index = None
+        expected = None
+        for element in document.get('body', {}).get('content', []):
+            if 'sectionBreak' in element:
+                continue
+            paragraph = element.get('paragraph')
+            if paragraph is None:
+                return None
+            for paragraph_element in paragraph.get('elements', []):
+                text_run = paragraph_element.get('textRun')
+                if text_run is None:
+                    return None
+                if start_index is None:
+                    start_index = expected = paragraph_element.get('startIndex', 1)
+                if paragraph_element.get('startIndex') != expected:
+                    return None
+                pieces.append(text_run.get('content', ''))
+                expected = paragraph_element.get('endIndex')
+
+        text = ''.join(pieces)
+        if start_index is None:
+            return 1, ''
+        if not text.endswith('\n') or expected - start_index != utf16_len(text):
+            return None
+        return start_index, text[:-1]
+
+    def diff_requests(self, current: str, new_lines: List[str], start_index: int = 1) -> List[Dict]:
+        """
+        Builds the batchUpdate requests that turn the current document text
+        into the content given as new_lines (see markdown_lines):
+        1. The current text is split into lines and compared with the new
+           lines section by section (see diff_lines)
+        2. Every changed block becomes a deleteContentRange over its old
+           lines and/or an insertText of its new lines
+        3. Line offsets are counted in UTF-16 code units from start_index
+        Edits are emitted from the end of the document to the start, so
+        each request only touches text before the spans already edited and
+        the indexes computed on the current text stay valid within one
+        batchUpdate.
+        """
+        old_lines = split_lines(current)
+        offsets = [start_index]
+        for line in old_lines:
+            offsets.append(offsets[-1] + utf16_len(line))
 
-        return content
+        requests = []
+        for i1, i2, j1, j2 in reversed(self.diff_lines(old_lines, new_lines)):
+            if i2 > i1:
+                requests.append({
+                    'deleteContentRange': {
+                        'range': {
+                            'startIndex': offsets[i1],
+                            'endIndex': offsets[i2]
+                        }
+                    }
+                })
+            if j2 > j1:
+                requests.append({
+                    'insertText': {
+                        'location': {'index': offsets[i1]},
+                        'text': ''.join(new_lines[j1:j2])
+                    }
+                })
+        return requests
+
+    def diff_lines(self, old_lines: List[str], new_lines: List[str]) -> List[Tuple[int, int, int, int]]:
+        """
+        Compares two documents given as lines and returns the changed
+        blocks as (i1, i2, j1, j2): old_lines[i1:i2] become new_lines[j1:j2],
+        in document order.
+        Lines such as separators and "Lokalita: Praha" repeat once per job,
+        which makes a line-level difflib run over a whole document of
+        thousands of jobs very slow. The documents are therefore first
+        cut into job sections (starting at "## " headings) and compared
+        section by section; only sections that changed are compared line
+        by line:
+        - blocks with as many old as new sections pair them up in order,
+          other replaced blocks are compared as a whole
+        - ranges of up to DOC_DIFF_MAX_LINES lines are diffed line by
+          line, larger ones are replaced as a whole
+        """
+        old_starts = self.section_starts(old_lines)
+        new_starts = self.section_starts(new_lines)
+        old_sections = [''.join(old_lines[a:b]) for a, b in zip(old_starts, old_starts[1:])]
+        new_sections = [''.join(new_lines[a:b]) for a, b in zip(new_starts, new_starts[1:])]
+
+        blocks = []
+        matcher = difflib.SequenceMatcher(None, old_sections, new_sections, autojunk=False)
+        for tag, s1, s2, t1, t2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            if tag == 'replace' and s2 - s1 == t2 - t1:
+                ranges = [(old_starts[old], old_starts[old + 1], new_starts[new], new_starts[new + 1])
+                          for old, new in zip(range(s1, s2), range(t1, t2))]
+            else:
+                ranges = [(old_starts[s1], old_starts[s2], new_starts[t1], new_starts[t2])]
+            for i1, i2, j1, j2 in ranges:
+                if tag != 'replace' or (i2 - i1) + (j2 - j1) > DOC_DIFF_MAX_LINES:
+                    blocks.append((i1, i2, j1, j2))
+                    continue
+                line_matcher = difflib.SequenceMatcher(None, old_lines[i1:i2], new_lines[j1:j2], autojunk=False)
+                for line_tag, a1, a2, b1, b2 in line_matcher.get_opcodes():
+                    if line_tag != 'equal':
+                        blocks.append((i1 + a1, i1 + a2, j1 + b1, j1 + b2))
+        return blocks
+
+    def section_starts(self, lines: List[str]) -> List[int]:
+        """
+        Returns the indexes of the lines that start a section (the
+        document header and every "## " job heading), followed by
+        len(lines).
+        """
+        starts = [0] + [index for index, line in enumerate(lines) if index and line.startswith('## ')]
+        starts.append(len(lines))
+        return starts
+
+    def replace_requests(self, document: Dict, content: str) -> List[Dict]:
+        """
+        Builds requests that clear the whole document body and insert
+        content, for documents whose body cannot be diffed.
+        """
+        end_index = document.get('body', {}).get('content', [{}])[-1].get('endIndex', 1)
+        logging.info(f"Document end index: {end_index}")
+        requests = []
+        if end_index - 1 > 1:
+            requests.append({
+                'deleteContentRange': {
+                    'range': {
+                        'startIndex': 1,
+                        'endIndex': end_index - 1
+                    }
+                }
+            })
+        requests.append({
+            'insertText': {
+                'location': {'index': 1},
+                'text': content
+            }
+        })
+        return requests
+
+    def split_text(self, text: str, max_size: int) -> List[str]:
+        """
+        Splits text into pieces of at most max_size characters, cutting on
+        job-section boundaries ("---" separators). Sections that are too
+        big on their own are cut on line boundaries, over-long lines at
+        max_size characters.
+        """
+        pieces = []
+        current: List[str] = []
+        size = 0
+        for section in re.split(r'(?<=\n---\n\n)', text):
+            if len(section) <= max_size:
+                parts = [section]
+            else:
+                parts = [line[i:i + max_size] for line in split_lines(section) for i in range(0, len(line), max_size)]
+            for part in parts:
+                if current and size + len(part) > max_size:
+                    pieces.append(''.join(current))
+                    current, size = [], 0
+                current.append(part)
+                size += len(part)
+        if current:
+            pieces.append(''.join(current))
+        return pieces
+
+    def chunk_requests(self, requests: List[Dict]) -> List[List[Dict]]:
+        """
+        Splits document edits into batches for consecutive batchUpdate
+        calls:
+        1. insertText requests longer than doc_chunk_size are split into
+           pieces (see split_text) inserted at advancing indexes, each
+           piece right after the previous one
+        2. Requests are packed in order into batches of at most
+           doc_chunk_size inserted characters and DOC_BATCH_REQUESTS
+           requests
+        Since the edits run from the end of the document to the start,
+        sending the batches one after another gives the same result as one
+        big batchUpdate.
+        """
+        batches = []
+        batch: List[Dict] = []
+        size = 0
+        for request in requests:
+            if 'insertText' in request:
+                index = request['insertText']['location']['index']
+                expanded = []
+                for piece in self.split_text(request['insertText']['text'], self.doc_chunk_size):
+                    expanded.append({
+                        'insertText': {
+                            'location': {'index': index},
+                            'text': piece
+                        }
+                    })
+                    index += utf16_len(piece)
+            else:
+                expanded = [request]
+
+            for item in expanded:
+                item_size = len(item['insertText']['text']) if 'insertText' in item else 0
+                if batch and (size + item_size > self.doc_chunk_size or len(batch) >= DOC_BATCH_REQUESTS):
+                    batches.append(batch)
+                    batch, size = [], 0
+                batch.append(item)
+                size += item_size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def publish_batches(self, doc_id: str, batches: List[List[Dict]], revision_id: Optional[str] = None):
+        """
+        Sends the batches as consecutive batchUpdate calls. Each call
+        requires the revision returned by the previous one, so a batch is
+        never applied on top of a document it was not computed for.
+        Failed calls are retried with backoff per batch according to
+        docs_retry_policy, which is separate from the crawl's budget.
+        Raises FetchError when a batch cannot be published.
+        """
+        retry_policy = self.docs_retry_policy
+        for number, batch in enumerate(batches, 1):
+            body: Dict[str, Any] = {'requests': batch}
+            if revision_id:
+                body['writeControl'] = {'requiredRevisionId': revision_id}
+            attempt = 1
+            while True:
+                try:
+                    response = self.docs_service.documents().batchUpdate(documentId=doc_id, body=body).execute()
+                    break
+                except Exception as e:
+                    error = retry_policy.classify(f"Google Doc {doc_id}", e)
+                    if not retry_policy.should_retry(error, attempt):
+                        raise error from e
+                    delay = retry_policy.backoff(attempt)
+                    logging.warning(f"Chunk {number}/{len(batches)} failed ({error}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    attempt += 1
+            revision_id = (response or {}).get('writeControl', {}).get('requiredRevisionId', revision_id)
+            logging.info(f"Published chunk {number}/{len(batches)} ({len(batch)} requests)")
 
     def update_google_doc(self):
         """
         Updates Google Doc with scraped job listings:
         1. Retrieves existing document
-        2. Clears current content
-        3. Inserts new markdown content
+        2. Diffs its text against the lines of the new markdown content,
+           which are built chunk by chunk (see markdown_lines)
+        3. Sends only the deletes and inserts of the changed lines, split
+           into size-bounded batchUpdate calls (see chunk_requests)
+        Documents with non-text content are cleared and rewritten instead.
+        When a chunk cannot be published, the document is retrieved again
+        and the update resumes from its current state, so chunks that were
+        already applied are not sent again.
         Implements error handling and logging.
         Returns True if update was successful.
         """
@@ -371,73 +3403,122 @@ class JobScraper:
             logging.error("Error: GOOGLE_DOC_ID not found in environment variables")
             return
 
-        content = self.create_markdown_content()
-        
+        lines = self.markdown_lines()
+
         try:
             logging.info(f"Attempting to update Google Doc with ID: {doc_id}")
             logging.info(f"Number of jobs to update: {len(self.jobs)}")
-            
-            # Retrieve the document to get the current content length
-            try:
-                document = self.docs_service.documents().get(documentId=doc_id).execute()
-                logging.info("Successfully retrieved document")
-            except Exception as e:
-                logging.error(f"Failed to retrieve document: {str(e)}")
-                raise
-                
-            end_index = document.get('body', {}).get('content', [{}])[-1].get('endIndex', 1)
-            logging.info(f"Document end index: {end_index}")
 
-            # Clear the existing content
-            requests = [{
-                'deleteContentRange': {
-                    'range': {
-                        'startIndex': 1,
-                        'endIndex': end_index - 1
-                    }
-                }
-            }]
+            for publish_round in range(1, DOC_PUBLISH_ROUNDS + 1):
+                # Retrieve the document to get the current content
+                try:
+                    document = self.docs_service.documents().get(documentId=doc_id).execute()
+                    logging.info("Successfully retrieved document")
+                except Exception as e:
+                    logging.error(f"Failed to retrieve document: {str(e)}")
+                    raise
 
-            # Insert new content
-            requests.append({
-                'insertText': {
-                    'location': {'index': 1},
-                    'text': content
-                }
-            })
+                current = self.read_document_text(document)
+                if current is None:
+                    logging.info("Document contains non-text elements, replacing the whole body")
+                    requests = self.replace_requests(document, ''.join(lines))
+                else:
+                    start_index, text = current
+                    requests = self.diff_requests(text, lines, start_index)
+                    inserted = sum(utf16_len(request['insertText']['text']) for request in requests if 'insertText' in request)
+                    logging.info(f"Diff against current document: {len(requests)} edits, "
+                                 f"{inserted} of {sum(map(utf16_len, lines))} characters to insert")
 
-            # Execute the update
-            try:
-                result = self.docs_service.documents().batchUpdate(
-                    documentId=doc_id,
-                    body={'requests': requests}
-                ).execute()
-                logging.info("Successfully updated Google Doc")
-                return True
-            except Exception as e:
-                logging.error(f"Failed to update document content: {str(e)}")
-                raise
+                if not requests:
+                    logging.info("Google Doc is already up to date")
+                    return True
+
+                batches = self.chunk_requests(requests)
+                try:
+                    self.publish_batches(doc_id, batches, document.get('revisionId'))
+                    logging.info(f"Successfully updated Google Doc in {len(batches)} chunks")
+                    return True
+                except FetchError as e:
+                    if publish_round == DOC_PUBLISH_ROUNDS:
+                        logging.error(f"Failed to update document content: {str(e)}")
+                        raise
+                    logging.warning(f"Publishing stopped ({str(e)}), resuming from the current document state")
 
         except Exception as e:
             logging.error(f"Error updating Google Doc: {str(e)}")
             return False
 
+def load_env():
+    """
+    Loads environment variables from a .env file when python-dotenv is
+    installed. Called from main only, so importing the module (e.g. in
+    parsing worker processes) stays cheap.
+    """
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
 def main():
     """
     Main entry point of the script.
     Coordinates the entire process:
     1. Creates scraper instance
-    2. Runs job scraping
-    3. Updates Google Doc
+    2. Runs job scraping, streaming jobs to the SCRAPER_SINKS outputs
+    3. Closes the sinks, which updates the Google Doc (skipped in scrape-only mode
+       and when listing pages could not be fetched)
+    4. Writes the MARKDOWN_OUTPUT file, if requested
     Implements error handling and proper exit codes.
     """
+    load_env()
     try:
-        scraper = JobScraper()
+        sinks = [create_sink(spec) for spec in os.getenv('SCRAPER_SINKS', '').split(',') if spec.strip()]
+        queries = [query.strip() for query in os.getenv('SCRAPER_QUERIES', 'python').split(',') if query.strip()]
+        scraper = JobScraper(
+            queries=queries,
+            parser=os.getenv('SCRAPER_PARSER') or None,
+            engine=os.getenv('SCRAPER_ENGINE', 'beautifulsoup'),
+            max_concurrency=int(os.getenv('SCRAPER_CONCURRENCY', '8')),
+            pool_size=int(os.getenv('SCRAPER_POOL_SIZE', '10')),
+            index_path=os.getenv('JOB_INDEX_PATH', 'jobs_index.json') or None,
+            index_refresh_days=float(os.getenv('JOB_INDEX_REFRESH_DAYS', '7')),
+            cache_dir=os.getenv('HTTP_CACHE_DIR', '.http_cache') or None,
+            requests_per_second=float(os.getenv('SCRAPER_RPS', '4')),
+            burst=int(os.getenv('SCRAPER_BURST', '4')),
+            max_attempts=int(os.getenv('SCRAPER_MAX_ATTEMPTS', '4')),
+            retry_budget=int(os.getenv('SCRAPER_RETRY_BUDGET', '50')),
+            parse_workers=int(os.getenv('SCRAPER_PARSE_WORKERS', '0')) or None,
+            parse_mode=os.getenv('SCRAPER_PARSE_MODE', 'auto'),
+            stream_details=os.getenv('SCRAPER_STREAM_DETAILS', '').lower() in ('1', 'true', 'yes'),
+            cards_only=os.getenv('SCRAPER_CARDS_ONLY', '').lower() in ('1', 'true', 'yes'),
+            doc_chunk_size=int(os.getenv('GOOGLE_DOC_CHUNK_SIZE', '200000')),
+            parse_cache_path=os.getenv('PARSE_CACHE_PATH', 'parse_cache.json') or None,
+            sinks=sinks,
+        )
+        if os.getenv('SCRAPER_SCRAPE_ONLY', '').lower() in ('1', 'true', 'yes'):
+            logging.info("Scrape-only mode, not updating Google Doc")
+        else:
+            scraper.sinks.append(GoogleDocSink(scraper))
         if not scraper.scrape_jobs():
+            scraper.close_sinks(complete=False)
             logging.error("Failed to scrape any jobs")
             sys.exit(1)
-        if not scraper.update_google_doc():
-            logging.error("Failed to update Google Doc")
+        # Closing the sinks hydrates cards-only jobs for the Google Doc, so
+        # the markdown file is written afterwards with the same details
+        sinks_closed = scraper.close_sinks(complete=not scraper.skipped_pages)
+        markdown_output = os.getenv('MARKDOWN_OUTPUT')
+        if markdown_output == '-':
+            scraper.write_markdown(sys.stdout)
+        elif markdown_output:
+            with open(markdown_output, 'w', encoding='utf-8') as f:
+                scraper.write_markdown(f)
+            logging.info(f"Markdown written to {markdown_output}")
+        if not sinks_closed:
+            logging.error("Failed to write results")
+            sys.exit(1)
+        if scraper.skipped_pages:
+            logging.error("Some listing pages could not be fetched, results are incomplete")
             sys.exit(1)
         logging.info("Script completed successfully")
     except Exception as e:
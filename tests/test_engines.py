@@ -0,0 +1,148 @@
+"""
+Equivalence tests of the extraction engines.
+
+SelectolaxJobsCzScraper must give exactly the same listing results and
+detail fields as the BeautifulSoup reference JobsCzScraper, field by
+field, on the reference fixtures and on pages that take the JSON-LD fast
+path or are not UTF-8 encoded. The extractor version that keys the
+parse cache must follow the parsing libraries and backend.
+
+Run with: python -m unittest discover tests
+"""
+import json
+import logging
+import unittest
+from unittest import mock
+
+import scraper
+
+JOB_POSTING = {
+    '@context': 'https://schema.org',
+    '@graph': [{
+        '@type': 'JobPosting',
+        'title': 'Python Developer',
+        'hiringOrganization': {'@type': 'Organization', 'name': 'Firma & syn s.r.o.'},
+        'jobLocation': [{'address': {'addressLocality': 'Praha'}}, {'address': {'addressRegion': 'Brno'}}],
+        'description': '<p>Hledáme <b>Python</b> vývojáře.</p><ul><li>Django</li><li>Žluťoučký kůň</li></ul>',
+        'datePosted': '2026-10-01',
+        'validThrough': '2026-11-01',
+        'employmentType': ['FULL_TIME', 'CONTRACTOR'],
+        'baseSalary': {'currency': 'CZK', 'value': {'minValue': 60000, 'maxValue': 90000, 'unitText': 'MONTH'}},
+    }],
+}
+
+JSON_LD_DETAIL = f"""<html><head>
+<script type="application/ld+json">{json.dumps(JOB_POSTING, ensure_ascii=False)}</script>
+</head><body><div data-jobad="body"><p>DOM text</p></div></body></html>"""
+
+# Incomplete JobPosting (no description): the DOM path fills in the text
+PARTIAL_JSON_LD_DETAIL = """<html><head>
+<script type="application/ld+json">{"@type": "JobPosting", "title": "Tester", "datePosted": "2026-10-02"}</script>
+</head><body><div data-jobad="body"><p>Testování  v&nbsp;Pythonu</p><script>x()</script></div></body></html>"""
+
+# Pages with Czech characters encoded in windows-1250
+LEGACY_LISTING = """<html><head><meta charset="windows-1250"></head><body>
+<h1 class="SearchHeader__title">42 nabídek práce</h1>
+<div class="SearchResultList"><article class="SearchResultCard">
+  <h2 class="SearchResultCard__title"><a class="link-primary" href="/rpd/2000111222/">Vývojář – Python</a></h2>
+  <ul><li><span translate="no">Žluťoučký kůň a.s.</span></li><li data-test="serp-locality">Ústí nad Labem</li></ul>
+</article></div></body></html>"""
+
+LEGACY_DETAIL = """<html><head><meta charset="windows-1250"></head><body>
+<div data-jobad="body"><h1>Vývojář</h1><p>Příliš žluťoučký kůň úpěl ďábelské ódy.</p></div></body></html>"""
+
+@unittest.skipIf(scraper.LexborHTMLParser is None, "selectolax is not installed")
+class EngineEquivalenceTest(unittest.TestCase):
+    """
+    Both engines parse the same pages into the same results.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.reference = scraper.JobsCzScraper(parser='html.parser')
+        self.candidate = scraper.SelectolaxJobsCzScraper(parser='html.parser')
+
+    def assert_same_listing(self, body: bytes, encoding: str):
+        expected_end, expected_count, expected_cards = self.reference.parse_listing(body, encoding)
+        actual_end, actual_count, actual_cards = self.candidate.parse_listing(body, encoding)
+        self.assertEqual(actual_end, expected_end)
+        self.assertEqual(actual_count, expected_count)
+        self.assertEqual(len(actual_cards), len(expected_cards))
+        for number, (actual, expected) in enumerate(zip(actual_cards, expected_cards)):
+            for field in set(actual or {}) | set(expected or {}):
+                with self.subTest(card=number, field=field):
+                    self.assertEqual((actual or {}).get(field), (expected or {}).get(field))
+        return expected_cards
+
+    def assert_same_detail(self, body: bytes, encoding: str) -> dict:
+        expected = self.reference.parse_detail(body, encoding)
+        actual = self.candidate.parse_detail(body, encoding)
+        for field in set(actual) | set(expected):
+            with self.subTest(field=field):
+                self.assertEqual(actual.get(field), expected.get(field))
+        return expected
+
+    def test_listing_fixtures(self):
+        for number, fixture in enumerate(scraper.JobsCzScraper.LISTING_REFERENCE_FIXTURES):
+            with self.subTest(fixture=number):
+                self.assert_same_listing(fixture.encode('utf-8'), 'utf-8')
+
+    def test_detail_fixtures(self):
+        for number, fixture in enumerate(scraper.JobsCzScraper.REFERENCE_FIXTURES):
+            with self.subTest(fixture=number):
+                self.assert_same_detail(fixture.encode('utf-8'), 'utf-8')
+
+    def test_json_ld_detail(self):
+        fields = self.assert_same_detail(JSON_LD_DETAIL.encode('utf-8'), 'utf-8')
+        self.assertEqual(fields['company'], 'Firma & syn s.r.o.')
+        self.assertEqual(fields['location'], 'Praha, Brno')
+        self.assertEqual(fields['salary'], '60000–90000 CZK/MONTH')
+        self.assertIn('Žluťoučký kůň', fields['text'])
+        self.assertNotIn('DOM text', fields['text'])
+
+    def test_partial_json_ld_detail(self):
+        fields = self.assert_same_detail(PARTIAL_JSON_LD_DETAIL.encode('utf-8'), 'utf-8')
+        self.assertEqual(fields['date_posted'], '2026-10-02')
+        self.assertEqual(fields['text'], 'Testování v\xa0Pythonu')
+
+    def test_non_utf8_listing(self):
+        body = LEGACY_LISTING.encode('windows-1250')
+        encoding, source = scraper.sniff_encoding(body)
+        self.assertEqual((encoding, source), ('cp1250', 'meta'))
+        cards = self.assert_same_listing(body, encoding)
+        self.assertEqual(cards[0]['title'], 'Vývojář – Python')
+        self.assertEqual(cards[0]['company'], 'Žluťoučký kůň a.s.')
+        self.assertEqual(cards[0]['location'], 'Ústí nad Labem')
+
+    def test_non_utf8_detail(self):
+        body = LEGACY_DETAIL.encode('windows-1250')
+        encoding, _ = scraper.sniff_encoding(body)
+        fields = self.assert_same_detail(body, encoding)
+        self.assertIn('Příliš žluťoučký kůň úpěl ďábelské ódy.', fields['text'])
+
+    def test_verify_engine_accepts_selectolax(self):
+        self.assertTrue(self.candidate.verify_engine(self.reference))
+
+class ExtractorVersionTest(unittest.TestCase):
+    """
+    The parse cache version changes with the parsing libraries and
+    backend.
+    """
+
+    def setUp(self):
+        self.board = scraper.JobsCzScraper(parser='html.parser')
+
+    def test_stable_for_the_same_setup(self):
+        self.assertEqual(self.board.extractor_version(), scraper.JobsCzScraper(parser='html.parser').extractor_version())
+
+    def test_changes_with_library_version(self):
+        version = self.board.extractor_version()
+        with mock.patch.object(scraper, 'package_version', return_value='0.0.1'):
+            self.assertNotEqual(self.board.extractor_version(), version)
+
+    def test_changes_with_parser_backend(self):
+        self.assertNotEqual(self.board.extractor_version(), scraper.JobsCzScraper(parser='lxml').extractor_version())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+"""
+Tests of the Google Doc update against an in-memory model of the Docs API.
+
+The model keeps the document body as UTF-16 code units and applies
+deleteContentRange / insertText requests with the API's index rules
+(index 1 is the first character, the body always ends with a newline), so
+any off-by-one or surrogate-pair mistake in the computed requests shows
+up as a wrong document text or a rejected range.
+
+Run with: python -m unittest discover tests
+"""
+import logging
+import os
+import random
+import unittest
+from unittest import mock
+
+import scraper
+
+class FakeHttpError(Exception):
+    """
+    Stand-in for googleapiclient's HttpError (classified via resp.status).
+    """
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.resp = mock.Mock(status=status)
+
+class FakeCall:
+    """
+    Deferred API call, executed like googleapiclient's HttpRequest.
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def execute(self):
+        return self.function()
+
+class FakeDocsService:
+    """
+    In-memory Google Docs API for a single plain-text document.
+    failures lists what happens to the next batchUpdate calls: None
+    applies the call, '503' rejects it and 'lost' applies it but raises a
+    timeout, as if the response never arrived.
+    """
+
+    def __init__(self, text: str = ''):
+        self.units = (text + '\n').encode('utf-16-le')
+        self.revision = 0
+        self.failures = []
+        self.batches = []
+
+    def text(self) -> str:
+        return self.units.decode('utf-16-le')
+
+    def documents(self):
+        return self
+
+    def get(self, documentId: str) -> FakeCall:
+        def get_document():
+            content = [{'endIndex': 1, 'sectionBreak': {}}]
+            index = 1
+            for line in self.text().splitlines(keepends=True):
+                end = index + len(line.encode('utf-16-le')) // 2
+                run = {'startIndex': index, 'endIndex': end, 'textRun': {'content': line}}
+                content.append({'startIndex': index, 'endIndex': end, 'paragraph': {'elements': [run]}})
+                index = end
+            return {'revisionId': f"r{self.revision}", 'body': {'content': content}}
+        return FakeCall(get_document)
+
+    def batchUpdate(self, documentId: str, body: dict) -> FakeCall:
+        def batch_update():
+            failure = self.failures.pop(0) if self.failures else None
+            if failure == '503':
+                raise FakeHttpError(503)
+            required = body.get('writeControl', {}).get('requiredRevisionId')
+            if required is not None and required != f"r{self.revision}":
+                raise FakeHttpError(400)
+
+            units = bytearray(self.units)
+            for request in body['requests']:
+                length = len(units) // 2
+                if 'deleteContentRange' in request:
+                    target = request['deleteContentRange']['range']
+                    start, end = target['startIndex'], target['endIndex']
+                    if not 1 <= start < end <= length:
+                        raise FakeHttpError(400)
+                    del units[2 * (start - 1):2 * (end - 1)]
+                elif 'insertText' in request:
+                    index = request['insertText']['location']['index']
+                    if not 1 <= index <= length:
+                        raise FakeHttpError(400)
+                    units[2 * (index - 1):2 * (index - 1)] = request['insertText']['text'].encode('utf-16-le')
+            units.decode('utf-16-le')  # a range splitting a surrogate pair leaves invalid UTF-16
+            self.units = bytes(units)
+            self.revision += 1
+            self.batches.append(body['requests'])
+            if failure == 'lost':
+                raise TimeoutError('timed out')
+            return {'writeControl': {'requiredRevisionId': f"r{self.revision}"}}
+        return FakeCall(batch_update)
+
+# Line fragments with multi-byte and astral (surrogate pair) characters
+WORDS = ['Python', 'kůň', '😀 emoji', '𝔘𝔫𝔦', '---', '', 'Žluť', 'job\n', 'x' * 50, '## Job', '\n## 😀']
+
+def random_text(rnd: random.Random) -> str:
+    return ''.join(rnd.choice(WORDS) + rnd.choice(['\n', '\n\n', ' ']) for _ in range(rnd.randint(0, 40)))
+
+def make_jobs(count: int, changed=()) -> list:
+    return [{
+        'title': f"Job {i}",
+        'url': f"https://www.jobs.cz/rpd/{i}/",
+        'job_id': str(i),
+        'company': "Firma 😀",
+        'location': "Praha",
+        'text': f"Popis {i}" + (" změna" if i in changed else ""),
+    } for i in range(count)]
+
+class GoogleDocTestCase(unittest.TestCase):
+    """
+    Base class providing a JobScraper wired to a FakeDocsService.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        environment = mock.patch.dict(os.environ, {'GOOGLE_DOC_ID': 'doc'})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.job_scraper = scraper.JobScraper(parser='html.parser')
+        self.job_scraper.docs_retry_policy.base_delay = 0.0
+
+    def publish(self, service: FakeDocsService, content: str) -> bool:
+        """
+        Runs update_google_doc with content as the rendered document.
+        """
+        self.job_scraper.docs_service = service
+        with mock.patch.object(self.job_scraper, 'iter_markdown_chunks', return_value=[content]):
+            return self.job_scraper.update_google_doc()
+
+class DiffRequestsTest(GoogleDocTestCase):
+    """
+    The line diff turns any document into the new content.
+    """
+
+    def test_random_edits(self):
+        rnd = random.Random(1)
+        for trial in range(500):
+            old, new = random_text(rnd), random_text(rnd)
+            service = FakeDocsService(old)
+            with self.subTest(trial=trial, old=old, new=new):
+                self.assertTrue(self.publish(service, new))
+                self.assertEqual(service.text(), new + '\n')
+
+    def test_random_edits_replacing_large_blocks(self):
+        rnd = random.Random(3)
+        with mock.patch.object(scraper, 'DOC_DIFF_MAX_LINES', 5):
+            for trial in range(300):
+                old, new = random_text(rnd), random_text(rnd)
+                service = FakeDocsService(old)
+                with self.subTest(trial=trial, old=old, new=new):
+                    self.assertTrue(self.publish(service, new))
+                    self.assertEqual(service.text(), new + '\n')
+
+    def test_large_document_diffs_by_section(self):
+        self.job_scraper.jobs = make_jobs(3000)
+        service = FakeDocsService(self.job_scraper.create_markdown_content())
+        self.job_scraper.jobs = make_jobs(3001, changed=(5, 2000))
+        self.job_scraper.jobs.insert(1500, self.job_scraper.jobs.pop())
+        content = self.job_scraper.create_markdown_content()
+        self.assertTrue(self.publish(service, content))
+        self.assertEqual(service.text(), content + '\n')
+        inserted = sum(len(request['insertText']['text'])
+                       for batch in service.batches for request in batch if 'insertText' in request)
+        self.assertLess(inserted, 300)
+
+    def test_markdown_lines_match_content(self):
+        self.job_scraper.jobs = make_jobs(50)
+        self.job_scraper.jobs[7]['text'] = ''
+        for chunks in (list(self.job_scraper.iter_markdown_chunks()), ['a', 'b\nc', '', '\n', 'd']):
+            with mock.patch.object(self.job_scraper, 'iter_markdown_chunks', return_value=chunks):
+                self.assertEqual(self.job_scraper.markdown_lines(), scraper.split_lines(''.join(chunks)))
+
+    def test_unchanged_document_sends_nothing(self):
+        self.job_scraper.jobs = make_jobs(20)
+        content = self.job_scraper.create_markdown_content()
+        service = FakeDocsService(content)
+        self.assertTrue(self.publish(service, content))
+        self.assertEqual(service.batches, [])
+
+    def test_changed_jobs_only_send_their_lines(self):
+        self.job_scraper.jobs = make_jobs(500)
+        service = FakeDocsService()
+        self.assertTrue(self.publish(service, self.job_scraper.create_markdown_content()))
+
+        self.job_scraper.jobs = make_jobs(501, changed=(3, 250))
+        content = self.job_scraper.create_markdown_content()
+        service.batches = []
+        self.assertTrue(self.publish(service, content))
+        self.assertEqual(service.text(), content + '\n')
+        inserted = sum(len(request['insertText']['text'])
+                       for batch in service.batches for request in batch if 'insertText' in request)
+        self.assertLess(inserted, 200)
+
+class ChunkedPublishTest(GoogleDocTestCase):
+    """
+    Large updates are split into size-bounded batchUpdate calls that
+    survive failed and lost calls.
+    """
+
+    def inserted_sizes(self, service: FakeDocsService) -> list:
+        return [sum(len(request['insertText']['text']) for request in batch if 'insertText' in request)
+                for batch in service.batches]
+
+    def test_chunks_respect_size_limit(self):
+        self.job_scraper.doc_chunk_size = 3000
+        self.job_scraper.jobs = make_jobs(300)
+        content = self.job_scraper.create_markdown_content()
+        service = FakeDocsService('old text\n' * 10)
+        self.assertTrue(self.publish(service, content))
+        self.assertEqual(service.text(), content + '\n')
+        self.assertGreater(len(service.batches), 1)
+        self.assertLessEqual(max(self.inserted_sizes(service)), 3000)
+
+    def test_failed_and_lost_calls_resume(self):
+        self.job_scraper.doc_chunk_size = 3000
+        self.job_scraper.jobs = make_jobs(300)
+        content = self.job_scraper.create_markdown_content()
+        service = FakeDocsService('old text\n' * 10)
+        service.failures = [None, '503', None, 'lost', 'lost']
+        self.assertTrue(self.publish(service, content))
+        self.assertEqual(service.text(), content + '\n')
+
+    def test_permanent_failure_reports_false(self):
+        service = FakeDocsService('old text\n')
+        service.failures = ['503'] * 100
+        self.assertFalse(self.publish(service, 'new text'))
+
+    def test_retries_after_crawl_spent_its_budget(self):
+        self.job_scraper.transport.retry_policy.retries = self.job_scraper.transport.retry_policy.budget
+        service = FakeDocsService('old text\n')
+        service.failures = ['503'] * 3
+        self.assertTrue(self.publish(service, 'new text'))
+        self.assertEqual(service.text(), 'new text\n')
+
+    def test_random_edits_with_failures(self):
+        self.job_scraper.doc_chunk_size = 37
+        rnd = random.Random(2)
+        for trial in range(300):
+            old, new = random_text(rnd), random_text(rnd)
+            service = FakeDocsService(old)
+            service.failures = [rnd.choice([None, None, '503', 'lost']) for _ in range(2)]
+            self.job_scraper.docs_retry_policy.retries = 0
+            with self.subTest(trial=trial, old=old, new=new):
+                self.assertTrue(self.publish(service, new))
+                self.assertEqual(service.text(), new + '\n')
+
+if __name__ == '__main__':
+    unittest.main()
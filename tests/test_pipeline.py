@@ -0,0 +1,149 @@
+"""
+Tests of the scraping pipeline against a fake transport.
+
+The fake serves numbered listing pages built from the reference listing
+fixture (two cards per page with page-specific job IDs), an
+end-of-listing page or a FetchError per page, and the first detail
+reference fixture for every job.
+
+Run with: python -m unittest discover tests
+"""
+import logging
+import os
+import tempfile
+import unittest
+
+import scraper
+
+LISTING = scraper.JobsCzScraper.LISTING_REFERENCE_FIXTURES[0]
+END_OF_LISTING = scraper.JobsCzScraper.LISTING_REFERENCE_FIXTURES[1]
+DETAIL = scraper.JobsCzScraper.REFERENCE_FIXTURES[0]
+
+def listing_page(number: int) -> str:
+    return LISTING.replace('2000123456', f"{number}000123456").replace('2000654321', f"{number}000654321")
+
+class FakeTransport:
+    """
+    Stands in for HttpTransport.fetch_async. pages maps listing page
+    numbers to markup or to a FetchError to raise; pages that are not
+    listed answer with the end-of-listing page. Every detail page answers
+    with detail.
+    """
+
+    def __init__(self, pages: dict, detail: str = DETAIL):
+        self.pages = pages
+        self.detail = detail
+        self.fetched = []
+        self.details_fetched = []
+
+    async def fetch_async(self, session, url: str, stream_until=None) -> scraper.FetchedPage:
+        if '/rpd/' in url:
+            self.details_fetched.append(url)
+            return scraper.FetchedPage(url, self.detail.encode('utf-8'), 'utf-8')
+        number = int(url.split('page=')[1]) if 'page=' in url else 1
+        self.fetched.append(number)
+        page = self.pages.get(number, END_OF_LISTING)
+        if isinstance(page, scraper.FetchError):
+            raise page
+        return scraper.FetchedPage(url, page.encode('utf-8'), 'utf-8')
+
+class PaginationTest(unittest.TestCase):
+    """
+    Failed listing pages are skipped or end the listing depending on the
+    kind of error.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.job_scraper = scraper.JobScraper(parser='html.parser', parse_mode='inline')
+
+    def scrape(self, pages: dict) -> FakeTransport:
+        transport = FakeTransport(pages)
+        self.job_scraper.transport.fetch_async = transport.fetch_async
+        self.assertTrue(self.job_scraper.scrape_jobs())
+        return transport
+
+    def test_retryable_failure_skips_the_page(self):
+        error = scraper.FetchError('url', 'HTTP 503', status=503, retryable=True)
+        transport = self.scrape({1: listing_page(1), 2: error, 3: listing_page(3)})
+        self.assertEqual(self.job_scraper.skipped_pages, [('python', 2)])
+        self.assertEqual([job['job_id'] for job in self.job_scraper.jobs],
+                         ['1000123456', '1000654321', '3000123456', '3000654321'])
+        self.assertEqual(transport.fetched, [1, 2, 3, 4])
+
+    def test_consecutive_retryable_failures_stop_pagination(self):
+        error = scraper.FetchError('url', 'HTTP 503', status=503, retryable=True)
+        pages = {1: listing_page(1), 2: error, 3: error, 4: error, 5: listing_page(5)}
+        transport = self.scrape(pages)
+        self.assertEqual(len(self.job_scraper.skipped_pages), scraper.MAX_LISTING_FAILURES)
+        self.assertEqual(transport.fetched, [1, 2, 3, 4])
+
+    def test_not_found_past_the_last_page_ends_the_listing(self):
+        error = scraper.FetchError('url', 'HTTP 404', status=404)
+        transport = self.scrape({1: listing_page(1), 2: listing_page(2), 3: listing_page(3),
+                                 4: error, 5: error, 6: error})
+        self.assertEqual(self.job_scraper.skipped_pages, [])
+        self.assertEqual(len(self.job_scraper.jobs), 6)
+        self.assertEqual(transport.fetched, [1, 2, 3, 4])
+
+class ListingEndTest(unittest.TestCase):
+    """
+    The raw end-of-listing check agrees with the parsed one.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.board = scraper.JobsCzScraper(parser='html.parser')
+
+    def test_raw_check_matches_parsed_check(self):
+        styled = LISTING.replace('<nav>', '<style>.SearchNoResults{display:none}</style><nav>')
+        for number, fixture in enumerate(scraper.JobsCzScraper.LISTING_REFERENCE_FIXTURES + [styled]):
+            body = fixture.encode('utf-8')
+            with self.subTest(fixture=number):
+                parsed, _, _ = self.board.parse_listing(body, 'utf-8')
+                self.assertEqual(self.board.listing_end_reason_raw(body, 'utf-8') is None, parsed is None)
+
+    def test_no_results_marker_on_a_full_page_keeps_paginating(self):
+        job_scraper = scraper.JobScraper(parser='html.parser', parse_mode='inline')
+        styled = listing_page(2).replace('<nav>', '<style>.SearchNoResults{display:none}</style><nav>')
+        transport = FakeTransport({1: listing_page(1), 2: styled, 3: listing_page(3)})
+        job_scraper.transport.fetch_async = transport.fetch_async
+        self.assertTrue(job_scraper.scrape_jobs())
+        self.assertEqual(len(job_scraper.jobs), 6)
+        self.assertEqual(transport.fetched, [1, 2, 3, 4])
+
+class SeenJobIndexTest(unittest.TestCase):
+    """
+    Jobs scraped on a previous run are reused from the seen-job index.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index_path = os.path.join(directory.name, 'jobs_index.json')
+
+    def scrape(self, pages: dict, detail: str) -> FakeTransport:
+        job_scraper = scraper.JobScraper(parser='html.parser', parse_mode='inline', index_path=self.index_path)
+        transport = FakeTransport(pages, detail)
+        job_scraper.transport.fetch_async = transport.fetch_async
+        self.assertTrue(job_scraper.scrape_jobs())
+        return transport
+
+    def test_card_fields_filled_from_json_ld_do_not_break_reuse(self):
+        # Card without a company; the JSON-LD block of the detail page has one
+        listing = listing_page(1).replace('<span translate="no">Firma &amp; syn s.r.o.</span>', '')
+        detail = DETAIL.replace('<head>', '<head><script type="application/ld+json">'
+                                '{"@type": "JobPosting", "title": "Python Developer", '
+                                '"hiringOrganization": {"name": "Firma s.r.o."}, '
+                                '"description": "<p>Popis</p>"}</script>')
+        first = self.scrape({1: listing}, detail)
+        self.assertEqual(len(first.details_fetched), 2)
+        second = self.scrape({1: listing}, detail)
+        self.assertEqual(second.details_fetched, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Offline tests of the transport building blocks.
+
+The clock of the rate limiter is replaced by a fake time.monotonic, so
+throttling events can be placed at exact instants; the HTTP cache works
+in a temporary directory.
+
+Run with: python -m unittest discover tests
+"""
+import logging
+import tempfile
+import unittest
+from unittest import mock
+
+import scraper
+
+class FakeClock:
+    """
+    Replacement for time.monotonic that only moves when told to.
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+class RateLimiterTest(unittest.TestCase):
+    """
+    The rate is halved once per throttling event, not once per
+    throttled response.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.clock = FakeClock()
+        patcher = mock.patch.object(scraper.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = scraper.RateLimiter(requests_per_second=4.0, burst=4)
+
+    def test_burst_of_throttled_responses_halves_once(self):
+        for _ in range(8):
+            self.limiter.on_throttled()
+            self.clock.now += 0.01
+        self.assertEqual(self.limiter.rate, 2.0)
+
+    def test_throttling_after_the_hold_halves_again(self):
+        self.limiter.on_throttled()
+        self.clock.now += 1 / 2.0 - 0.01
+        self.limiter.on_throttled()
+        self.assertEqual(self.limiter.rate, 2.0)
+        self.clock.now += 0.02
+        self.limiter.on_throttled()
+        self.assertEqual(self.limiter.rate, 1.0)
+
+    def test_retry_after_holds_the_rate_and_extends_the_pause(self):
+        self.limiter.on_throttled('10')
+        self.assertEqual(self.limiter.rate, 2.0)
+        self.clock.now += 5
+        self.limiter.on_throttled('10')
+        self.assertEqual(self.limiter.rate, 2.0)
+        self.assertAlmostEqual(self.limiter.reserve(), 10.0)
+        self.clock.now += 5.01
+        self.limiter.on_throttled()
+        self.assertEqual(self.limiter.rate, 1.0)
+
+    def test_rate_does_not_drop_below_minimum(self):
+        for _ in range(20):
+            self.limiter.on_throttled()
+            self.clock.now += 100
+        self.assertEqual(self.limiter.rate, self.limiter.min_rate)
+
+class HttpCacheTest(unittest.TestCase):
+    """
+    Streamed pages cut off after the ad body are only served to streamed
+    fetches.
+    """
+
+    URL = 'https://www.jobs.cz/rpd/2000123456/'
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = scraper.HttpCache(directory.name)
+
+    def store(self, body: bytes, truncated: bool):
+        self.cache.store(scraper.FetchedPage(self.URL, body, 'utf-8', etag='"v1"', truncated=truncated))
+
+    def test_truncated_entry_is_hidden_from_full_fetches(self):
+        self.store(b'<div data-jobad="body">ad</div>', truncated=True)
+        self.assertIsNone(self.cache.lookup(self.URL))
+        self.assertEqual(self.cache.conditional_headers(self.cache.lookup(self.URL)), {})
+
+    def test_truncated_entry_is_served_to_streamed_fetches(self):
+        self.store(b'<div data-jobad="body">ad</div>', truncated=True)
+        entry = self.cache.lookup(self.URL, partial=True)
+        self.assertTrue(self.cache.is_fresh(self.URL, entry))
+        page = self.cache.load(self.URL, entry)
+        self.assertTrue(page.truncated)
+        self.assertEqual(page.body, b'<div data-jobad="body">ad</div>')
+
+    def test_full_page_replaces_truncated_entry(self):
+        self.store(b'<div data-jobad="body">ad</div>', truncated=True)
+        self.store(b'<div data-jobad="body">ad</div><footer>full</footer>', truncated=False)
+        for partial in (False, True):
+            with self.subTest(partial=partial):
+                page = self.cache.load(self.URL, self.cache.lookup(self.URL, partial=partial))
+                self.assertFalse(page.truncated)
+                self.assertIn(b'full', page.body)
+
+    def test_entries_survive_a_reload(self):
+        self.store(b'<div data-jobad="body">ad</div>', truncated=True)
+        self.cache.save()
+        reloaded = scraper.HttpCache(self.cache.directory)
+        self.assertIsNone(reloaded.lookup(self.URL))
+        self.assertIsNotNone(reloaded.lookup(self.URL, partial=True))
+
+if __name__ == '__main__':
+    unittest.main()